@@ -0,0 +1,26 @@
+"""
+Response compression.
+
+GZip for regular responses, with streaming endpoints left uncompressed:
+a gzip stream buffers small writes, which would hold back Server-Sent
+Events until the buffer fills (older Starlette releases don't skip
+text/event-stream on their own).
+"""
+from typing import Iterable
+
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that passes the given paths through uncompressed."""
+
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = (), **kwargs) -> None:
+        super().__init__(app, **kwargs)
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
@@ -9,6 +9,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+# Largest accepted image upload (barcode scans and vision detection)
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+
+# GPT-4o vision calls allowed in flight at once, and per second, per worker
+GPT4O_MAX_CONCURRENT = int(os.getenv("GPT4O_MAX_CONCURRENT", "3"))
+GPT4O_REQUESTS_PER_SECOND = float(os.getenv("GPT4O_REQUESTS_PER_SECOND", "5"))
+
+
 def get_openai_api_key() -> str:
     """
     Get OpenAI API key from environment.
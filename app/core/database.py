@@ -1,29 +1,73 @@
+import logging
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set")
 
-engine = create_engine(DATABASE_URL, echo=True)
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+
+# Queries slower than this are logged as warnings
+SLOW_QUERY_THRESHOLD_SECONDS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100")) / 1000
+
+# Log every statement (development only - very noisy and slow)
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+
+
+def _async_database_url(url: str) -> str:
+    """Point a plain postgresql:// URL at the asyncpg driver."""
+    parsed = make_url(url)
+    if parsed.drivername in ("postgres", "postgresql", "postgresql+psycopg2"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+engine = create_async_engine(
+    _async_database_url(DATABASE_URL),
+    echo=SQL_ECHO,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    pool_recycle=DB_POOL_RECYCLE_SECONDS
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _log_slow_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    if elapsed > SLOW_QUERY_THRESHOLD_SECONDS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
 
-SessionLocal = sessionmaker(
-    autocommit=False,
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
     autoflush=False,
-    bind=engine
+    expire_on_commit=False
 )
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,48 @@
+"""
+HTTP caching helpers.
+
+Conditional GET support (ETag / If-None-Match) so clients can revalidate
+a response and skip the body when nothing changed.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag for a serialized response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (weak comparison) against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def etag_response(request: Request, body: bytes, cache_control: str) -> Response:
+    """
+    Build a JSON response with ETag/Cache-Control headers.
+
+    Returns 304 Not Modified (no body) if the client already has this version.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        body: Serialized JSON body
+        cache_control: Cache-Control header value
+
+    Returns:
+        200 response with the body, or empty 304 response
+    """
+    etag = compute_etag(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,46 @@
+"""
+Logging configuration.
+
+Request handlers only enqueue log records; a background listener thread
+does the actual (blocking) stream writes, so error bursts never stall
+the event loop on stderr I/O.
+"""
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging() -> None:
+    """Route the root logger through a queue drained by a listener thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,46 @@
+"""
+Client-side rate limiting for outbound API calls.
+
+Keeps bursts of work under a provider's requests-per-second limit so calls
+wait locally instead of failing with HTTP 429.
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token-bucket limiter: `rate` calls per second, bursts of up to `capacity`.
+
+    Thread-safe; usable from worker threads (acquire) and the event loop (aacquire).
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token; return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative reserves a future token, so waiters are served in order
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block the calling thread until a call is allowed."""
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        """Wait (without blocking the event loop) until a call is allowed."""
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
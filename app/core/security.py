@@ -7,7 +7,9 @@ This module provides:
 - FastAPI dependency for protected routes
 """
 import os
+import time
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 from uuid import UUID
 
@@ -24,6 +26,9 @@ SECRET_KEY = os.getenv("JWT_SECRET_KEY", "fallback-secret-key-for-dev")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Number of recently seen tokens whose verified claims are kept in memory
+TOKEN_CACHE_SIZE = 4096
+
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -65,6 +70,24 @@ def create_access_token(user_id: UUID, expires_delta: Optional[timedelta] = None
     return encoded_jwt
 
 
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _decode_claims(token: str) -> Optional[tuple[UUID, Optional[int]]]:
+    """
+    Verify a JWT once and return its (user_id, exp) claims.
+
+    Memoized because a client sends the same token on every request;
+    expiry is re-checked by the caller on each use.
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id_str: str = payload.get("sub")
+        if user_id_str is None:
+            return None
+        return UUID(user_id_str), payload.get("exp")
+    except (JWTError, ValueError):
+        return None
+
+
 def decode_token(token: str) -> Optional[UUID]:
     """
     Decode and validate a JWT token.
@@ -75,15 +98,16 @@ def decode_token(token: str) -> Optional[UUID]:
     Returns:
         The user_id UUID if valid, None otherwise
     """
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id_str: str = payload.get("sub")
-        if user_id_str is None:
-            return None
-        return UUID(user_id_str)
-    except (JWTError, ValueError):
+    claims = _decode_claims(token)
+    if claims is None:
+        return None
+
+    user_id, expires_at = claims
+    if expires_at is not None and expires_at < time.time():
         return None
 
+    return user_id
+
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> UUID:
     """
@@ -101,14 +125,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UUID:
     Raises:
         HTTPException: If token is invalid or expired
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
     user_id = decode_token(token)
     if user_id is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     return user_id
@@ -1,14 +1,58 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
+from app.core.compression import StreamAwareGZipMiddleware
 from app.core.database import engine, Base
+from app.core.logging_config import setup_logging, shutdown_logging
 from app.models import user, draft_item, inventory_item, saved_recipe  # noqa: F401
 from app.routers import auth, draft_items, inventory_items, expiry_prediction, ingestion, recipes
+from app.services.ingestion.barcode_scanner import log_cpu_features
+from app.services.ingestion.gpt4o_vision import gpt4o_vision_client
+from app.services.ingestion.product_lookup import openfoodfacts_client
+from app.services.recipe import recipe_generation_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_logging()
+
+    # Confirm the OpenCV wheel ships vectorized (AVX2/NEON) image kernels
+    log_cpu_features()
+
+    # Bounded pool for blocking image decoding (barcode scans) so it never
+    # runs on the event loop thread
+    app.state.cpu_pool = ThreadPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        thread_name_prefix="cpu"
+    )
+    yield
+    await openfoodfacts_client.aclose()
+    await recipe_generation_service.aclose()
+    await gpt4o_vision_client.aclose()
+    app.state.cpu_pool.shutdown(wait=True)
+    await engine.dispose()
+    shutdown_logging()
 
 
 app = FastAPI(
     title="SnapShelf Backend",
     version="0.1.0",
-    description="AI-assisted food waste reduction through trusted inventory management"
+    description="AI-assisted food waste reduction through trusted inventory management",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+# Compress larger bodies (saved recipes, inventory lists); small ones aren't worth it.
+# The SSE recipe stream is left uncompressed so each event is flushed immediately.
+app.add_middleware(
+    StreamAwareGZipMiddleware,
+    exclude_paths=("/api/recipes/generate/stream",),
+    minimum_size=1024,
+    compresslevel=5
 )
 
 # Register routers
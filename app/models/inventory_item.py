@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Numeric, Date, ForeignKey
+from sqlalchemy import Column, String, DateTime, Numeric, Date, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -15,7 +15,7 @@ class InventoryItem(Base):
 
     # Identity
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     # Core food data - all required (user has confirmed these)
     name = Column(String, nullable=False)
@@ -28,3 +28,15 @@ class InventoryItem(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     # Note: No updated_at - core fields are immutable after creation (except quantity)
+
+    # Serves per-user listing ordered by expiry and the expiring-soon range scan.
+    # INCLUDE makes the expiring-ingredients query index-only. A partial index on
+    # "expiry_date >= CURRENT_DATE" isn't possible: index predicates must be immutable.
+    __table_args__ = (
+        Index(
+            "ix_inventory_user_expiry",
+            user_id,
+            expiry_date,
+            postgresql_include=["name", "quantity", "unit"]
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 import uuid
@@ -14,7 +14,7 @@ class SavedRecipe(Base):
     __tablename__ = "saved_recipes"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
     # Recipe data stored as JSON
     title = Column(String, nullable=False)
@@ -27,4 +27,11 @@ class SavedRecipe(Base):
     tips = Column(String, nullable=True)
     recommendation_reason = Column(String, nullable=True)
 
-    saved_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    saved_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Serves the per-user "most recently saved first" listing without a sort step;
+    # a user can save a given recipe title only once (enforced by the database)
+    __table_args__ = (
+        Index("ix_saved_user_saved_at", user_id, saved_at.desc()),
+        UniqueConstraint("user_id", "title", name="uq_saved_user_title"),
+    )
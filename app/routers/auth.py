@@ -3,7 +3,9 @@ Authentication router for user registration and login.
 """
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.security import hash_password, verify_password, create_access_token, get_current_user
@@ -14,9 +16,9 @@ router = APIRouter(tags=["auth"])
 
 
 @router.post("/register", response_model=Token, status_code=201)
-def register(
+async def register(
     user_data: UserRegister,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Register a new user.
@@ -24,40 +26,42 @@ def register(
     Creates a new user account and returns a JWT token.
     """
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    existing_user = result.scalar_one_or_none()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
-    # Create new user
-    hashed_pwd = hash_password(user_data.password)
-    new_user = User(
-        email=user_data.email,
-        hashed_password=hashed_pwd
-    )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # Create new user (bcrypt is CPU-bound, keep it off the event loop)
+    hashed_pwd = await run_in_threadpool(hash_password, user_data.password)
+    # Only the new id is needed for the token, so return just that
+    new_user_id = (await db.execute(
+        insert(User).values(
+            email=user_data.email,
+            hashed_password=hashed_pwd
+        ).returning(User.id)
+    )).scalar_one()
+    await db.commit()
 
     # Generate token
-    access_token = create_access_token(user_id=new_user.id)
+    access_token = create_access_token(user_id=new_user_id)
 
     return Token(access_token=access_token)
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     credentials: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Authenticate a user and return a JWT token.
     """
     # Find user by email
-    user = db.query(User).filter(User.email == credentials.email).first()
+    result = await db.execute(select(User).where(User.email == credentials.email))
+    user = result.scalar_one_or_none()
 
     if not user:
         raise HTTPException(
@@ -67,7 +71,7 @@ def login(
         )
 
     # Verify password
-    if not verify_password(credentials.password, user.hashed_password):
+    if not await run_in_threadpool(verify_password, credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -91,12 +95,12 @@ def login(
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(
     current_user_id: UUID = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get the current authenticated user's profile.
     """
-    user = db.query(User).filter(User.id == current_user_id).first()
+    user = await db.get(User, current_user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
@@ -15,9 +16,9 @@ router = APIRouter(prefix="/draft-items", tags=["draft-items"])
 
 
 @router.post("", response_model=DraftItemResponse, status_code=201)
-def create_draft_item(
+async def create_draft_item(
     draft: DraftItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user),
     predict_expiry: bool = True
 ):
@@ -50,58 +51,55 @@ def create_draft_item(
         else:
             draft_data["notes"] = f"[Auto-predicted: {prediction.reasoning}]"
 
-    db_draft = DraftItem(
-        user_id=user_id,
-        **draft_data
-    )
-    db.add(db_draft)
-    db.commit()
-    db.refresh(db_draft)
+    # Core INSERT ... RETURNING: no ORM instance, no refresh SELECT
+    draft_data["user_id"] = user_id
+    draft_table = DraftItem.__table__
+    db_draft = (await db.execute(
+        draft_table.insert().returning(draft_table),
+        [draft_data]
+    )).mappings().one()
+    await db.commit()
     return db_draft
 
 
 @router.get("", response_model=List[DraftItemResponse])
-def list_draft_items(
-    db: Session = Depends(get_db),
+async def list_draft_items(
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """List all draft items for the current user"""
-    drafts = db.query(DraftItem).filter(DraftItem.user_id == user_id).all()
-    return drafts
+    # Core rows (no ORM identity map); the response model validates the mappings
+    stmt = select(DraftItem.__table__).where(DraftItem.user_id == user_id)
+    result = await db.execute(stmt)
+    return result.mappings().all()
 
 
 @router.get("/{draft_id}", response_model=DraftItemResponse)
-def get_draft_item(
+async def get_draft_item(
     draft_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """Get a specific draft item"""
-    draft = db.query(DraftItem).filter(
-        DraftItem.id == draft_id,
-        DraftItem.user_id == user_id
-    ).first()
+    draft = await db.get(DraftItem, draft_id)
 
-    if not draft:
+    if not draft or draft.user_id != user_id:
         raise HTTPException(status_code=404, detail="Draft item not found")
 
     return draft
 
 
 @router.patch("/{draft_id}", response_model=DraftItemResponse)
-def update_draft_item(
+async def update_draft_item(
     draft_id: UUID,
     updates: DraftItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """Update a draft item before confirmation"""
-    draft = db.query(DraftItem).filter(
-        DraftItem.id == draft_id,
-        DraftItem.user_id == user_id
-    ).first()
+    draft = await db.get(DraftItem, draft_id)
 
-    if not draft:
+    if not draft or draft.user_id != user_id:
         raise HTTPException(status_code=404, detail="Draft item not found")
 
     # Update only provided fields
@@ -109,63 +107,59 @@ def update_draft_item(
     for field, value in update_data.items():
         setattr(draft, field, value)
 
-    db.commit()
-    db.refresh(draft)
+    await db.commit()
+    await db.refresh(draft)
     return draft
 
 
 @router.delete("/{draft_id}", status_code=204)
-def delete_draft_item(
+async def delete_draft_item(
     draft_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """Discard a draft item"""
-    draft = db.query(DraftItem).filter(
-        DraftItem.id == draft_id,
-        DraftItem.user_id == user_id
-    ).first()
+    draft = await db.get(DraftItem, draft_id)
 
-    if not draft:
+    if not draft or draft.user_id != user_id:
         raise HTTPException(status_code=404, detail="Draft item not found")
 
-    db.delete(draft)
-    db.commit()
+    await db.delete(draft)
+    await db.commit()
     return None
 
 
 @router.post("/{draft_id}/confirm", response_model=InventoryItemResponse, status_code=201)
-def confirm_draft_item(
+async def confirm_draft_item(
     draft_id: UUID,
     confirmation: InventoryItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
     SACRED OPERATION: Confirm a draft item and promote it to inventory.
     This is the core invariant of SnapShelf.
     """
-    # Verify draft exists and belongs to user
-    draft = db.query(DraftItem).filter(
-        DraftItem.id == draft_id,
-        DraftItem.user_id == user_id
-    ).first()
-
-    if not draft:
+    # Consume the draft; RETURNING tells us whether it existed and belonged to the user
+    deleted_id = (await db.execute(
+        delete(DraftItem)
+        .where(DraftItem.id == draft_id, DraftItem.user_id == user_id)
+        .returning(DraftItem.id)
+        .execution_options(synchronize_session=False)
+    )).scalar_one_or_none()
+
+    if deleted_id is None:
         raise HTTPException(status_code=404, detail="Draft item not found")
 
-    # Create trusted inventory item
-    inventory_item = InventoryItem(
-        user_id=user_id,
-        **confirmation.model_dump()
-    )
-
-    db.add(inventory_item)
-
-    # Delete the draft (it's been confirmed)
-    db.delete(draft)
+    # Create trusted inventory item in the same transaction
+    inventory_data = confirmation.model_dump()
+    inventory_data["user_id"] = user_id
+    inventory_table = InventoryItem.__table__
+    inventory_item = (await db.execute(
+        inventory_table.insert().returning(inventory_table),
+        [inventory_data]
+    )).mappings().one()
 
-    db.commit()
-    db.refresh(inventory_item)
+    await db.commit()
 
     return inventory_item
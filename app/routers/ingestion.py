@@ -1,22 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from datetime import date
 from typing import List
+import orjson
 
+from app.core.config import MAX_IMAGE_BYTES
 from app.core.database import get_db
+from app.core.http_cache import etag_response
 from app.core.security import get_current_user
 from app.models.draft_item import DraftItem
 from app.schemas.draft_item import DraftItemResponse
-from app.services.ingestion.barcode_ingestion import barcode_ingestion_service
+from app.services.ingestion.barcode_ingestion import BarcodeIngestionResult, barcode_ingestion_service
 from app.services.ingestion.image_ingestion import image_ingestion_service
 
 
 router = APIRouter(prefix="/ingest", tags=["ingestion"])
 
 
+def _barcode_draft_row(result: BarcodeIngestionResult, storage_location: str, user_id: UUID) -> dict:
+    """DraftItem column values for a barcode ingestion result."""
+    notes_parts = [f"[Barcode: {result.barcode}]"]
+    if result.reasoning:
+        notes_parts.append(f"[{result.reasoning}]")
+        if result.brand:
+            notes_parts.append(f"Brand: {result.brand}")
+        if result.product_info and result.product_info.quantity:
+            notes_parts.append(f"Quantity: {result.product_info.quantity}")
+
+    return {
+        "user_id": user_id,
+        "name": result.name,
+        "category": result.category,
+        "location": storage_location,
+        "source": "barcode",
+        "confidence_score": result.confidence_score,
+        "expiration_date": (
+            date.fromisoformat(result.predicted_expiry) if result.predicted_expiry else None
+        ),
+        "notes": "\n".join(notes_parts),
+    }
+
+
 @router.get("/barcode/{barcode}")
 async def lookup_barcode(
     barcode: str,
+    request: Request,
     storage_location: str = "fridge",
     user_id: UUID = Depends(get_current_user)
 ):
@@ -31,9 +60,10 @@ async def lookup_barcode(
         storage_location: Where the item will be stored (for expiry prediction)
 
     Returns:
-        Product info with predicted expiry date
+        Product info with predicted expiry date. Responses carry an ETag so
+        repeat scans can be revalidated with If-None-Match (304, no body).
     """
-    result = barcode_ingestion_service.ingest_from_barcode(
+    result = await barcode_ingestion_service.ingest_from_barcode(
         barcode=barcode,
         storage_location=storage_location
     )
@@ -44,7 +74,7 @@ async def lookup_barcode(
             detail=result.error_message or "Failed to process barcode"
         )
 
-    return {
+    payload = {
         "barcode": result.barcode,
         "name": result.name,
         "category": result.category,
@@ -56,19 +86,28 @@ async def lookup_barcode(
         "found_in_database": result.product_info is not None,
     }
 
+    return etag_response(
+        request,
+        orjson.dumps(payload),
+        # predicted_expiry is relative to today, so always revalidate (the
+        # ETag/304 path still skips the body); private as the route is authenticated
+        cache_control="private, no-cache"
+    )
+
 
 @router.post("/barcode", response_model=DraftItemResponse, status_code=201)
 async def ingest_barcode(
+    request: Request,
     image: UploadFile = File(..., description="Image file containing barcode"),
     storage_location: str = Form("fridge", description="Where the item will be stored"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
     Scan barcode from image and create draft item.
 
     Workflow:
-    1. Detect barcode from uploaded image (pyzxing)
+    1. Detect barcode from uploaded image (pyzbar)
     2. Look up product in Open Food Facts database
     3. Predict expiry date based on category and storage
     4. Create DraftItem for user review/confirmation
@@ -82,19 +121,12 @@ async def ingest_barcode(
             detail="Invalid file type. Please upload an image (JPEG, PNG, etc.)"
         )
 
-    # Read image bytes
-    try:
-        image_bytes = await image.read()
-    except Exception as e:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Failed to read image file: {str(e)}"
-        )
-
-    # Process barcode
-    result = barcode_ingestion_service.ingest_from_image(
-        image_bytes=image_bytes,
-        storage_location=storage_location
+    # Process barcode, streaming the spooled upload instead of reading it into memory.
+    # Decoding blocks, so it runs on the app's bounded CPU pool.
+    result = await barcode_ingestion_service.ingest_from_image(
+        image_file=image.file,
+        storage_location=storage_location,
+        executor=request.app.state.cpu_pool
     )
 
     if not result.success:
@@ -103,45 +135,68 @@ async def ingest_barcode(
             detail=result.error_message or "Failed to process barcode"
         )
 
-    # Create draft item
-    draft_data = {
-        "name": result.name,
-        "category": result.category,
-        "location": storage_location,
-        "source": "barcode",
-        "confidence_score": result.confidence_score,
-    }
+    # Save to database with a Core INSERT (RETURNING fills in id/timestamps)
+    draft_table = DraftItem.__table__
+    db_draft = (await db.execute(
+        draft_table.insert().returning(draft_table),
+        [_barcode_draft_row(result, storage_location, user_id)]
+    )).mappings().one()
+    await db.commit()
 
-    # Add optional fields if available
-    if result.predicted_expiry:
-        draft_data["expiration_date"] = result.predicted_expiry
+    return db_draft
 
-    if result.reasoning:
-        draft_data["notes"] = f"[Barcode: {result.barcode}]\n[{result.reasoning}]"
-        if result.brand:
-            draft_data["notes"] += f"\nBrand: {result.brand}"
-        if result.product_info and result.product_info.quantity:
-            draft_data["notes"] += f"\nQuantity: {result.product_info.quantity}"
-    else:
-        draft_data["notes"] = f"[Barcode: {result.barcode}]"
-
-    # Save to database
-    db_draft = DraftItem(
-        user_id=user_id,
-        **draft_data
+
+@router.post("/barcodes", response_model=List[DraftItemResponse], status_code=201)
+async def ingest_barcodes(
+    request: Request,
+    images: List[UploadFile] = File(..., description="One or more images containing barcodes"),
+    storage_location: str = Form("fridge", description="Where the items will be stored"),
+    db: AsyncSession = Depends(get_db),
+    user_id: UUID = Depends(get_current_user)
+):
+    """
+    Scan every barcode in one or more images and create a draft item for each.
+
+    Same workflow as /ingest/barcode, but images are decoded concurrently and
+    all detected products are looked up in Open Food Facts with a single
+    batched request. A barcode appearing in several images yields one draft.
+    """
+    # Validate file types
+    for image in images:
+        if not image.content_type or not image.content_type.startswith("image/"):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid file type. Please upload images (JPEG, PNG, etc.)"
+            )
+
+    results = await barcode_ingestion_service.ingest_many_from_images(
+        image_files=[image.file for image in images],
+        storage_location=storage_location,
+        executor=request.app.state.cpu_pool
     )
-    db.add(db_draft)
-    db.commit()
-    db.refresh(db_draft)
 
-    return db_draft
+    if not results[0].success:
+        raise HTTPException(
+            status_code=400,
+            detail=results[0].error_message or "Failed to process barcodes"
+        )
+
+    # One multi-row INSERT for all drafts
+    draft_table = DraftItem.__table__
+    created_drafts = (await db.execute(
+        draft_table.insert().returning(draft_table),
+        [_barcode_draft_row(result, storage_location, user_id) for result in results]
+    )).mappings().all()
+    await db.commit()
+
+    return created_drafts
 
 
 @router.post("/image", response_model=List[DraftItemResponse], status_code=201)
 async def ingest_image(
     image: UploadFile = File(..., description="Image of fridge or groceries"),
     storage_location: str = Form("fridge", description="Where items will be stored"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
@@ -166,17 +221,23 @@ async def ingest_image(
             detail="Invalid file type. Please upload an image (JPEG, PNG, etc.)"
         )
 
-    # Read image bytes
+    # Read image bytes (bounded, so an oversized upload is never fully buffered)
     try:
-        image_bytes = await image.read()
+        image_bytes = await image.read(MAX_IMAGE_BYTES + 1)
     except Exception as e:
         raise HTTPException(
             status_code=400,
             detail=f"Failed to read image file: {str(e)}"
         )
 
-    # Process image
-    result = image_ingestion_service.ingest_from_image(
+    if len(image_bytes) > MAX_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Image is too large. Maximum size is {MAX_IMAGE_BYTES // (1024 * 1024)} MB."
+        )
+
+    # Process image (async OpenAI client, awaited on the event loop)
+    result = await image_ingestion_service.ingest_from_image_async(
         image_bytes=image_bytes,
         storage_location=storage_location
     )
@@ -187,35 +248,33 @@ async def ingest_image(
             detail=result.error_message or "Failed to process image"
         )
 
-    # Create a DraftItem for each detected food item
-    created_drafts = []
-    for item in result.detected_items:
-        draft_data = {
+    # Create a DraftItem for each detected food item in one multi-row INSERT
+    rows = [
+        {
+            "user_id": user_id,
             "name": item.name,
             "category": item.category,
             "location": storage_location,
             "source": "image",
             "confidence_score": item.confidence_score,
+            "expiration_date": (
+                date.fromisoformat(item.predicted_expiry) if item.predicted_expiry else None
+            ),
+            # Add reasoning as notes
+            "notes": (
+                f"[Image detection - GPT-4o]\n[{item.reasoning}]"
+                if item.reasoning
+                else "[Image detection - GPT-4o]"
+            ),
         }
-
-        # Add expiry prediction if available
-        if item.predicted_expiry:
-            draft_data["expiration_date"] = item.predicted_expiry
-
-        # Add reasoning as notes
-        if item.reasoning:
-            draft_data["notes"] = f"[Image detection - GPT-4o]\n[{item.reasoning}]"
-        else:
-            draft_data["notes"] = "[Image detection - GPT-4o]"
-
-        # Save to database
-        db_draft = DraftItem(
-            user_id=user_id,
-            **draft_data
-        )
-        db.add(db_draft)
-        db.commit()
-        db.refresh(db_draft)
-        created_drafts.append(db_draft)
+        for item in result.detected_items
+    ]
+
+    draft_table = DraftItem.__table__
+    created_drafts = (await db.execute(
+        draft_table.insert().returning(draft_table),
+        rows
+    )).mappings().all()
+    await db.commit()
 
     return created_drafts
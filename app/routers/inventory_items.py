@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
@@ -14,80 +16,84 @@ from app.schemas.inventory_item import (
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
+_INVENTORY_LIST_ADAPTER = TypeAdapter(List[InventoryItemResponse])
+
 
 @router.get("", response_model=List[InventoryItemResponse])
-def list_inventory_items(
-    db: Session = Depends(get_db),
+async def list_inventory_items(
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """List all confirmed inventory items for the current user"""
-    items = db.query(InventoryItem).filter(
+    # Core rows (no ORM identity map). Rows are trusted, so build the models
+    # without validation and return the serialized list directly, which also
+    # skips FastAPI's response_model re-validation
+    stmt = select(InventoryItem.__table__).where(
         InventoryItem.user_id == user_id
-    ).order_by(InventoryItem.expiry_date).all()
-    return items
+    ).order_by(InventoryItem.expiry_date)
+    result = await db.execute(stmt)
+    items = [
+        InventoryItemResponse.model_construct(**{**row, "quantity": float(row["quantity"])})
+        for row in result.mappings()
+    ]
+    return Response(
+        content=_INVENTORY_LIST_ADAPTER.dump_json(items),
+        media_type="application/json"
+    )
 
 
 @router.get("/{item_id}", response_model=InventoryItemResponse)
-def get_inventory_item(
+async def get_inventory_item(
     item_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """Get a specific inventory item"""
-    item = db.query(InventoryItem).filter(
-        InventoryItem.id == item_id,
-        InventoryItem.user_id == user_id
-    ).first()
+    item = await db.get(InventoryItem, item_id)
 
-    if not item:
+    if not item or item.user_id != user_id:
         raise HTTPException(status_code=404, detail="Inventory item not found")
 
     return item
 
 
 @router.patch("/{item_id}/quantity", response_model=InventoryItemResponse)
-def update_inventory_quantity(
+async def update_inventory_quantity(
     item_id: UUID,
     update: InventoryItemUpdateQuantity,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
     Update quantity of an inventory item.
     Note: Other fields are immutable (PRD requirement)
     """
-    item = db.query(InventoryItem).filter(
-        InventoryItem.id == item_id,
-        InventoryItem.user_id == user_id
-    ).first()
+    item = await db.get(InventoryItem, item_id)
 
-    if not item:
+    if not item or item.user_id != user_id:
         raise HTTPException(status_code=404, detail="Inventory item not found")
 
     item.quantity = update.quantity
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await db.refresh(item)
 
     return item
 
 
 @router.put("/{item_id}", response_model=InventoryItemResponse)
-def update_inventory_item(
+async def update_inventory_item(
     item_id: UUID,
     update: InventoryItemUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
     Update an inventory item's fields.
     Only provided fields will be updated.
     """
-    item = db.query(InventoryItem).filter(
-        InventoryItem.id == item_id,
-        InventoryItem.user_id == user_id
-    ).first()
+    item = await db.get(InventoryItem, item_id)
 
-    if not item:
+    if not item or item.user_id != user_id:
         raise HTTPException(status_code=404, detail="Inventory item not found")
 
     # Update only provided fields
@@ -95,30 +101,27 @@ def update_inventory_item(
     for field, value in update_data.items():
         setattr(item, field, value)
 
-    db.commit()
-    db.refresh(item)
+    await db.commit()
+    await db.refresh(item)
 
     return item
 
 
 @router.delete("/{item_id}", status_code=204)
-def delete_inventory_item(
+async def delete_inventory_item(
     item_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
     Delete an inventory item (e.g., when consumed or thrown away)
     """
-    item = db.query(InventoryItem).filter(
-        InventoryItem.id == item_id,
-        InventoryItem.user_id == user_id
-    ).first()
+    item = await db.get(InventoryItem, item_id)
 
-    if not item:
+    if not item or item.user_id != user_id:
         raise HTTPException(status_code=404, detail="Inventory item not found")
 
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
 
     return None
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import TypeAdapter
 from uuid import UUID
 from datetime import date, timedelta
-from typing import List
+from typing import AsyncIterator, List, Optional
+
+import orjson
 
 from app.core.database import get_db
+from app.core.http_cache import compute_etag, etag_response
 from app.core.security import get_current_user
 from app.models.inventory_item import InventoryItem
 from app.models.saved_recipe import SavedRecipe
@@ -12,19 +19,70 @@ from app.schemas.recipe import (
     RecipeGenerationRequest,
     RecipeGenerationResponse,
     IngredientInput,
+    RecipeIngredient,
     SaveRecipeRequest,
-    SavedRecipeResponse,
-    RecipeIngredient
+    SavedRecipeResponse
 )
 from app.services.recipe import recipe_generation_service
 
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
+_SAVED_RECIPES_ADAPTER = TypeAdapter(List[SavedRecipeResponse])
+_INGREDIENTS_ADAPTER = TypeAdapter(List[IngredientInput])
+_RECIPE_INGREDIENTS_ADAPTER = TypeAdapter(List[RecipeIngredient])
+
+# Unique (user_id, title) constraint on saved_recipes
+_SAVED_TITLE_CONSTRAINT = "uq_saved_user_title"
+
+
+def _violated_constraint(error: IntegrityError) -> Optional[str]:
+    """
+    Name of the constraint behind an IntegrityError, if the driver reports it.
+
+    asyncpg errors (wrapped by SQLAlchemy's adapter, so also checked via
+    __cause__) carry constraint_name; psycopg exposes it under diag.
+    """
+    for source in (error.orig, getattr(error.orig, "__cause__", None)):
+        name = getattr(source, "constraint_name", None) or getattr(
+            getattr(source, "diag", None), "constraint_name", None
+        )
+        if name:
+            return name
+    return None
+
+
+def _wants_cache(request: Request) -> bool:
+    """False when the client sent "Cache-Control: no-cache" (e.g. "Regenerate")."""
+    return "no-cache" not in request.headers.get("cache-control", "")
+
+
+def _saved_recipe_response(saved: SavedRecipe) -> SavedRecipeResponse:
+    """
+    Build a SavedRecipeResponse from a SavedRecipe row without validation.
+
+    Rows were validated as SaveRecipeRequest on the way in, so they are trusted.
+    """
+    return SavedRecipeResponse.model_construct(
+        id=saved.id,
+        title=saved.title,
+        description=saved.description,
+        cooking_time_minutes=saved.cooking_time_minutes,
+        servings=saved.servings,
+        difficulty=saved.difficulty,
+        ingredients=[RecipeIngredient.model_construct(**ing) for ing in saved.ingredients],
+        instructions=saved.instructions,
+        tips=saved.tips,
+        recommendation_reason=saved.recommendation_reason or "",
+        saved_at=saved.saved_at
+    )
+
 
 @router.post("/generate", response_model=RecipeGenerationResponse)
 async def generate_recipes(
     request: RecipeGenerationRequest,
+    http_request: Request,
+    response: Response,
     user_id: UUID = Depends(get_current_user)
 ):
     """
@@ -37,6 +95,10 @@ async def generate_recipes(
     Optional preferences:
     - time_preference: "quick" (<30min), "normal" (30-60min), "any" (default)
     - servings: Target portions (1-6, default 2)
+
+    Identical requests within an hour are answered from cache; send
+    "Cache-Control: no-cache" to force a fresh generation (e.g. "Regenerate").
+    The response carries an ETag of the recipe set.
     """
     if not request.ingredients:
         raise HTTPException(
@@ -45,23 +107,71 @@ async def generate_recipes(
         )
 
     try:
-        result = recipe_generation_service.generate_recipes(
+        result = await recipe_generation_service.agenerate_recipes(
             ingredients=request.ingredients,
             max_recipes=request.max_recipes,
             mode=request.mode,
             selected_ingredient_names=request.selected_ingredient_names,
             time_preference=request.time_preference,
-            servings=request.servings
+            servings=request.servings,
+            use_cache=_wants_cache(http_request)
         )
+        response.headers["ETag"] = compute_etag(result.model_dump_json().encode())
         return result
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/generate/stream")
+async def stream_recipes(
+    request: RecipeGenerationRequest,
+    http_request: Request,
+    user_id: UUID = Depends(get_current_user)
+):
+    """
+    Generate recipe suggestions as a Server-Sent Events stream.
+
+    Same request body and caching as /generate. Emits "delta" events with
+    raw JSON text as it is generated, then one "result" event holding the
+    parsed RecipeGenerationResponse. Failures after the stream has started
+    arrive as an "error" event.
+    """
+    if not request.ingredients:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one ingredient is required"
+        )
+
+    async def events() -> AsyncIterator[bytes]:
+        try:
+            async for item in recipe_generation_service.astream_recipes(
+                ingredients=request.ingredients,
+                max_recipes=request.max_recipes,
+                mode=request.mode,
+                selected_ingredient_names=request.selected_ingredient_names,
+                time_preference=request.time_preference,
+                servings=request.servings,
+                use_cache=_wants_cache(http_request)
+            ):
+                if isinstance(item, str):
+                    yield b"event: delta\ndata: " + orjson.dumps(item) + b"\n\n"
+                else:
+                    yield b"event: result\ndata: " + item.model_dump_json().encode() + b"\n\n"
+        except RuntimeError as e:
+            # The only exception astream_recipes raises (see its docstring)
+            yield b"event: error\ndata: " + orjson.dumps({"detail": str(e)}) + b"\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
 @router.get("/expiring-ingredients", response_model=List[IngredientInput])
 async def get_expiring_ingredients(
     days: int = 3,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
@@ -72,27 +182,40 @@ async def get_expiring_ingredients(
     """
     cutoff_date = date.today() + timedelta(days=days)
 
-    items = db.query(InventoryItem).filter(
+    # Only the columns IngredientInput needs
+    stmt = select(
+        InventoryItem.name,
+        InventoryItem.quantity,
+        InventoryItem.unit,
+        InventoryItem.expiry_date
+    ).where(
         InventoryItem.user_id == user_id,
         InventoryItem.expiry_date <= cutoff_date,
         InventoryItem.expiry_date >= date.today()  # Not already expired
-    ).order_by(InventoryItem.expiry_date).all()
-
-    return [
-        IngredientInput(
-            name=item.name,
-            quantity=float(item.quantity),
-            unit=item.unit,
-            expiry_date=item.expiry_date.isoformat()
+    ).order_by(InventoryItem.expiry_date)
+    result = await db.execute(stmt)
+
+    # Trusted DB values (validated on confirmation): construct without validation
+    # and serialize directly instead of going through response_model validation
+    ingredients = [
+        IngredientInput.model_construct(
+            name=name,
+            quantity=float(quantity),
+            unit=unit,
+            expiry_date=expiry_date.isoformat()
         )
-        for item in items
+        for name, quantity, unit, expiry_date in result
     ]
+    return Response(
+        content=_INGREDIENTS_ADAPTER.dump_json(ingredients),
+        media_type="application/json"
+    )
 
 
 @router.post("/saved", response_model=SavedRecipeResponse)
 async def save_recipe(
     request: SaveRecipeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
@@ -100,98 +223,80 @@ async def save_recipe(
 
     Users can save recipes they like for quick access later.
     """
-    # Check if recipe with same title already saved
-    existing = db.query(SavedRecipe).filter(
-        SavedRecipe.user_id == user_id,
-        SavedRecipe.title == request.title
-    ).first()
-
-    if existing:
+    # RETURNING brings back id/saved_at in the same round-trip as the INSERT.
+    # Duplicates (same user + title) are rejected by the uq_saved_user_title constraint.
+    try:
+        saved = (await db.execute(
+            insert(SavedRecipe).values(
+                user_id=user_id,
+                title=request.title,
+                description=request.description,
+                cooking_time_minutes=request.cooking_time_minutes,
+                servings=request.servings,
+                difficulty=request.difficulty,
+                ingredients=_RECIPE_INGREDIENTS_ADAPTER.dump_python(request.ingredients),
+                instructions=request.instructions,
+                tips=request.tips,
+                recommendation_reason=request.recommendation_reason
+            ).returning(SavedRecipe)
+        )).scalar_one()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        # Only the duplicate-title constraint means "already saved"; anything
+        # else (e.g. a missing user row) is a real error
+        if _violated_constraint(e) != _SAVED_TITLE_CONSTRAINT:
+            raise
         raise HTTPException(
             status_code=400,
             detail="Recipe already saved"
         )
 
-    saved = SavedRecipe(
-        user_id=user_id,
-        title=request.title,
-        description=request.description,
-        cooking_time_minutes=request.cooking_time_minutes,
-        servings=request.servings,
-        difficulty=request.difficulty,
-        ingredients=[ing.model_dump() for ing in request.ingredients],
-        instructions=request.instructions,
-        tips=request.tips,
-        recommendation_reason=request.recommendation_reason
-    )
-    db.add(saved)
-    db.commit()
-    db.refresh(saved)
-
-    return SavedRecipeResponse(
-        id=str(saved.id),
-        title=saved.title,
-        description=saved.description,
-        cooking_time_minutes=saved.cooking_time_minutes,
-        servings=saved.servings,
-        difficulty=saved.difficulty,
-        ingredients=[RecipeIngredient(**ing) for ing in saved.ingredients],
-        instructions=saved.instructions,
-        tips=saved.tips,
-        recommendation_reason=saved.recommendation_reason or "",
-        saved_at=saved.saved_at.isoformat()
-    )
+    return _saved_recipe_response(saved)
 
 
 @router.get("/saved", response_model=List[SavedRecipeResponse])
 async def get_saved_recipes(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
     Get all saved/favorited recipes.
 
-    Returns recipes ordered by most recently saved.
+    Returns recipes ordered by most recently saved. Carries an ETag; clients
+    revalidate with If-None-Match and get 304 (no body) if nothing changed.
     """
-    saved = db.query(SavedRecipe).filter(
+    stmt = select(SavedRecipe).where(
         SavedRecipe.user_id == user_id
-    ).order_by(SavedRecipe.saved_at.desc()).all()
-
-    return [
-        SavedRecipeResponse(
-            id=str(s.id),
-            title=s.title,
-            description=s.description,
-            cooking_time_minutes=s.cooking_time_minutes,
-            servings=s.servings,
-            difficulty=s.difficulty,
-            ingredients=[RecipeIngredient(**ing) for ing in s.ingredients],
-            instructions=s.instructions,
-            tips=s.tips,
-            recommendation_reason=s.recommendation_reason or "",
-            saved_at=s.saved_at.isoformat()
-        )
-        for s in saved
-    ]
+    ).order_by(SavedRecipe.saved_at.desc()).execution_options(yield_per=200)
+    result = await db.stream_scalars(stmt)
+
+    # Trusted rows: construct models directly, serialize the whole list in one pass
+    saved_recipes = [_saved_recipe_response(s) async for s in result]
+
+    # Per-user data: private, but always revalidate so new saves show up
+    return etag_response(
+        request,
+        _SAVED_RECIPES_ADAPTER.dump_json(saved_recipes),
+        cache_control="private, no-cache"
+    )
 
 
 @router.delete("/saved/{recipe_id}")
 async def unsave_recipe(
     recipe_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     user_id: UUID = Depends(get_current_user)
 ):
     """
     Remove a recipe from favorites (unsave).
     """
-    saved = db.query(SavedRecipe).filter(
-        SavedRecipe.id == recipe_id,
-        SavedRecipe.user_id == user_id
-    ).first()
+    saved = await db.get(SavedRecipe, recipe_id)
 
-    if not saved:
+    if not saved or saved.user_id != user_id:
         raise HTTPException(status_code=404, detail="Saved recipe not found")
 
-    db.delete(saved)
-    db.commit()
+    await db.delete(saved)
+    await db.commit()
     return {"message": "Recipe removed from favorites"}
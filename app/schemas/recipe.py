@@ -1,9 +1,28 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Literal
+from uuid import UUID
+from datetime import datetime
+
+__all__ = [
+    "IngredientInput",
+    "RecipeGenerationRequest",
+    "RecipeIngredient",
+    "RecipeResponse",
+    "RecipeGenerationResponse",
+    "SaveRecipeRequest",
+    "SavedRecipeResponse",
+]
+
+# Core schemas are built on first use (or by FastAPI at route registration)
+# instead of at import, keeping startup cheap for workers and scripts that
+# never touch every model
+_DEFERRED = ConfigDict(defer_build=True)
 
 
 class IngredientInput(BaseModel):
     """Ingredient provided by user for recipe generation"""
+    model_config = _DEFERRED
+
     name: str = Field(..., min_length=1)
     quantity: Optional[float] = None
     unit: Optional[str] = None
@@ -12,6 +31,8 @@ class IngredientInput(BaseModel):
 
 class RecipeGenerationRequest(BaseModel):
     """Request payload for recipe generation"""
+    model_config = _DEFERRED
+
     ingredients: List[IngredientInput] = Field(..., min_length=1)
     max_recipes: int = Field(default=3, ge=1, le=5)
     mode: Literal["auto", "manual"] = "auto"
@@ -22,6 +43,8 @@ class RecipeGenerationRequest(BaseModel):
 
 class RecipeIngredient(BaseModel):
     """Single ingredient in a recipe"""
+    model_config = _DEFERRED
+
     name: str
     quantity: str
     from_inventory: bool = False
@@ -31,6 +54,8 @@ class RecipeIngredient(BaseModel):
 
 class RecipeResponse(BaseModel):
     """Single recipe suggestion"""
+    model_config = _DEFERRED
+
     title: str
     description: str
     cooking_time_minutes: int
@@ -44,6 +69,8 @@ class RecipeResponse(BaseModel):
 
 class RecipeGenerationResponse(BaseModel):
     """Response containing multiple recipe suggestions"""
+    model_config = _DEFERRED
+
     recipes: List[RecipeResponse]
     ingredients_used: List[str]
     ingredients_missing: List[str]
@@ -51,6 +78,8 @@ class RecipeGenerationResponse(BaseModel):
 
 class SaveRecipeRequest(BaseModel):
     """Request to save a recipe to favorites"""
+    model_config = _DEFERRED
+
     title: str
     description: str
     cooking_time_minutes: int
@@ -64,7 +93,9 @@ class SaveRecipeRequest(BaseModel):
 
 class SavedRecipeResponse(BaseModel):
     """A saved/favorited recipe"""
-    id: str
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
+
+    id: UUID
     title: str
     description: str
     cooking_time_minutes: int
@@ -74,7 +105,4 @@ class SavedRecipeResponse(BaseModel):
     instructions: List[str]
     tips: Optional[str] = None
     recommendation_reason: str = ""
-    saved_at: str  # ISO format
-
-    class Config:
-        from_attributes = True
+    saved_at: datetime
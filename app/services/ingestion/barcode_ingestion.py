@@ -4,15 +4,23 @@ Barcode ingestion orchestration.
 Combines barcode scanning, product lookup, and expiry prediction
 to create DraftItems from barcode images.
 """
-from typing import Optional
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import BinaryIO, List, Optional
 from dataclasses import dataclass
+from datetime import date
+
+from cachetools import TTLCache
 
 from app.services.ingestion.barcode_scanner import barcode_scanner
 from app.services.ingestion.product_lookup import openfoodfacts_client, ProductInfo
 from app.services.expiry_prediction import expiry_prediction_service
 
+logger = logging.getLogger(__name__)
+
 
-@dataclass
+@dataclass(slots=True)
 class BarcodeIngestionResult:
     """Result of barcode ingestion process"""
     success: bool
@@ -30,6 +38,11 @@ class BarcodeIngestionResult:
     reasoning: Optional[str] = None
 
 
+# Cache sizing for barcode lookups (product data rarely changes)
+BARCODE_CACHE_MAX_ENTRIES = 10_000
+BARCODE_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+
 class BarcodeIngestionService:
     """
     Orchestrates the full barcode ingestion flow:
@@ -39,7 +52,15 @@ class BarcodeIngestionService:
     4. Return draft item data
     """
 
-    def ingest_from_barcode(self, barcode: str, storage_location: str = "fridge") -> BarcodeIngestionResult:
+    def __init__(self):
+        # (barcode, storage_location, day) -> result; the day is part of the key
+        # because the predicted expiry is relative to today
+        self._cache: TTLCache = TTLCache(
+            maxsize=BARCODE_CACHE_MAX_ENTRIES,
+            ttl=BARCODE_CACHE_TTL_SECONDS
+        )
+
+    async def ingest_from_barcode(self, barcode: str, storage_location: str = "fridge") -> BarcodeIngestionResult:
         """
         Process barcode string and return draft item data.
 
@@ -50,9 +71,27 @@ class BarcodeIngestionService:
         Returns:
             BarcodeIngestionResult with product info and predictions
         """
-        # Look up product in Open Food Facts
-        product_info = openfoodfacts_client.lookup_product(barcode)
+        cache_key = (barcode, storage_location, date.today())
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+        # Look up product in Open Food Facts
+        product_info = await openfoodfacts_client.lookup_product(barcode)
+
+        result = self._build_result(barcode, product_info, storage_location)
+        # Misses are not cached here: a lookup failure may be transient
+        if product_info:
+            self._cache[cache_key] = result
+        return result
+
+    def _build_result(
+        self,
+        barcode: str,
+        product_info: Optional[ProductInfo],
+        storage_location: str
+    ) -> BarcodeIngestionResult:
+        """Turn a lookup outcome into draft item data (with expiry prediction)."""
         if not product_info:
             # Barcode not in database - return partial success
             return BarcodeIngestionResult(
@@ -84,21 +123,30 @@ class BarcodeIngestionService:
             reasoning=prediction.reasoning
         )
 
-    def ingest_from_image(self, image_bytes: bytes, storage_location: str = "fridge") -> BarcodeIngestionResult:
+    async def ingest_from_image(
+        self,
+        image_file: BinaryIO,
+        storage_location: str = "fridge",
+        executor: Optional[Executor] = None
+    ) -> BarcodeIngestionResult:
         """
         Process barcode image and return draft item data.
 
         Args:
-            image_bytes: Image file bytes containing barcode
+            image_file: Binary file-like object with the image containing the barcode
             storage_location: Where user will store the item (for expiry prediction)
+            executor: Executor for the blocking decode (default: loop's thread pool)
 
         Returns:
             BarcodeIngestionResult with product info and predictions
         """
-        # Step 1: Scan barcode from image
+        # Step 1: Scan barcode from image (blocking, off the event loop)
         try:
-            barcode = barcode_scanner.scan_image(image_bytes)
+            barcode = await asyncio.get_running_loop().run_in_executor(
+                executor, barcode_scanner.scan_file, image_file
+            )
         except Exception as e:
+            logger.warning("Barcode scan failed: %s", e)
             return BarcodeIngestionResult(
                 success=False,
                 error_message=f"Failed to scan image: {str(e)}"
@@ -110,41 +158,74 @@ class BarcodeIngestionService:
                 error_message="No barcode detected in image. Please ensure the barcode is clearly visible."
             )
 
-        # Step 2: Look up product in Open Food Facts
-        product_info = openfoodfacts_client.lookup_product(barcode)
+        # Steps 2-4: lookup, expiry prediction, draft data (shares the lookup cache)
+        return await self.ingest_from_barcode(barcode, storage_location)
 
-        if not product_info:
-            # Barcode scanned but not in database
-            # Return partial success - user can manually enter details
-            return BarcodeIngestionResult(
-                success=True,
-                barcode=barcode,
-                product_info=None,
-                name=f"Product {barcode}",
-                error_message=f"Barcode {barcode} not found in database. Please enter product details manually."
-            )
+    async def ingest_many_from_images(
+        self,
+        image_files: List[BinaryIO],
+        storage_location: str = "fridge",
+        executor: Optional[Executor] = None
+    ) -> List[BarcodeIngestionResult]:
+        """
+        Process several barcode images at once.
 
-        # Step 3: Predict expiry date
-        prediction = expiry_prediction_service.predict_expiry(
-            name=product_info.name,
-            category=product_info.category,
-            storage_location=storage_location
-        )
+        All images are decoded concurrently on the executor, then every
+        barcode not already cached is looked up in one batched request.
+        Images that fail to decode are skipped as long as another one
+        yields a barcode.
 
-        # Step 4: Return complete draft item data
-        return BarcodeIngestionResult(
-            success=True,
-            barcode=barcode,
-            product_info=product_info,
-            name=product_info.name,
-            category=product_info.category,
-            brand=product_info.brand,
-            image_url=product_info.image_url,
-            predicted_expiry=prediction.expiry_date.isoformat(),
-            confidence_score=prediction.confidence,
-            reasoning=prediction.reasoning
+        Args:
+            image_files: Binary file-like objects, one per image
+            storage_location: Where user will store the items (for expiry prediction)
+            executor: Executor for the blocking decode (default: loop's thread pool)
+
+        Returns:
+            One BarcodeIngestionResult per unique detected barcode, or a single
+            failed result if scanning failed or nothing was detected
+        """
+        loop = asyncio.get_running_loop()
+        scans = await asyncio.gather(
+            *(loop.run_in_executor(executor, barcode_scanner.scan_file_all, f) for f in image_files),
+            return_exceptions=True
         )
 
+        barcodes: List[str] = []
+        scan_error: Optional[Exception] = None
+        for scan in scans:
+            if isinstance(scan, Exception):
+                logger.warning("Barcode scan failed: %s", scan)
+                scan_error = scan_error or scan
+            else:
+                barcodes.extend(scan)
+        barcodes = list(dict.fromkeys(barcodes))
+
+        if not barcodes:
+            if scan_error is not None:
+                return [BarcodeIngestionResult(
+                    success=False,
+                    error_message=f"Failed to scan image: {str(scan_error)}"
+                )]
+            return [BarcodeIngestionResult(
+                success=False,
+                error_message="No barcode detected in image. Please ensure the barcodes are clearly visible."
+            )]
+
+        today = date.today()
+        results = {b: self._cache.get((b, storage_location, today)) for b in barcodes}
+        misses = [b for b, result in results.items() if result is None]
+
+        if misses:
+            products = await openfoodfacts_client.lookup_products(misses)
+            for barcode in misses:
+                product_info = products[barcode]
+                result = self._build_result(barcode, product_info, storage_location)
+                if product_info:
+                    self._cache[(barcode, storage_location, today)] = result
+                results[barcode] = result
+
+        return [results[b] for b in barcodes]
+
 
 # Singleton instance
 barcode_ingestion_service = BarcodeIngestionService()
@@ -3,23 +3,75 @@ GPT-4o Vision API client for food item detection.
 
 Uses OpenAI's GPT-4o model to analyze images and detect food items.
 """
+import asyncio
 import base64
-import json
+import hashlib
+import io
+import sys
+import threading
 from dataclasses import dataclass
 from typing import List, Optional
 
-from openai import OpenAI
+import orjson
+from cachetools import TTLCache
+from openai import AsyncOpenAI, OpenAI
+from PIL import Image
+from pydantic import TypeAdapter, ValidationError
 
-from app.core.config import get_openai_api_key
+from app.core.config import (
+    GPT4O_MAX_CONCURRENT,
+    GPT4O_REQUESTS_PER_SECOND,
+    MAX_IMAGE_BYTES,
+    get_openai_api_key,
+)
+from app.core.rate_limit import TokenBucket
 
 
-@dataclass
+@dataclass(slots=True)
 class DetectedFoodItem:
     """Single food item detected in an image."""
     name: str
     category: Optional[str] = None
 
 
+# Validates a parsed reply entry into a DetectedFoodItem with one compiled validator
+_ITEM_ADAPTER = TypeAdapter(DetectedFoodItem)
+
+
+# Magic-byte signatures checked in order: (image type, prefix, second marker at offset 8)
+_IMAGE_SIGNATURES = (
+    ("jpeg", b"\xff\xd8\xff", None),
+    ("png", b"\x89PNG\r\n\x1a\n", None),
+    ("gif", (b"GIF87a", b"GIF89a"), None),
+    ("webp", b"RIFF", b"WEBP"),  # RIFF container: "RIFF" <size> "WEBP"
+)
+
+# Signatures keyed by their first 3 bytes (JPEG's whole signature), so one
+# dict lookup selects the only signature that can match
+_SIGNATURES_BY_LEAD = {
+    (prefix if isinstance(prefix, bytes) else prefix[0])[:3]: (image_type, prefix, marker)
+    for image_type, prefix, marker in _IMAGE_SIGNATURES
+}
+
+# Every known prefix, for a single startswith() gate that rejects unknown data
+_KNOWN_PREFIXES = tuple(
+    known
+    for _, prefix, _ in _IMAGE_SIGNATURES
+    for known in ((prefix,) if isinstance(prefix, bytes) else prefix)
+)
+
+
+# Categories the prompt asks for, mapped to one shared (interned) string each,
+# so parsed items reuse these objects instead of holding per-response copies
+_CANONICAL_CATEGORIES = {
+    category: sys.intern(category)
+    for category in (
+        "Fruits", "Vegetables", "Dairy", "Meat", "Fish", "Grains",
+        "Snacks", "Beverages", "Frozen", "Condiments", "Other",
+    )
+}
+
+
 # Prompt for GPT-4o to detect food items
 DETECTION_PROMPT = """Analyze this image and identify all visible food items.
 
@@ -50,6 +102,29 @@ Return a JSON object with this exact structure:
 
 If no food items are visible, return: {"items": []}"""
 
+# The prompt's message part is identical for every request; build it once
+# (the SDK only reads it when serializing the request)
+_PROMPT_PART = {"type": "text", "text": DETECTION_PROMPT}
+
+# Appended to DETECTION_PROMPT when several images share one request
+BATCH_DETECTION_INSTRUCTIONS = """
+
+You will receive {count} images. Analyze each image separately, as described above.
+Return a JSON object with exactly one entry per image, in the order the images were given:
+{{"results": [{{"items": [{{"name": "item name", "category": "Category"}}]}}]}}"""
+
+# Images sent per batched detection request
+DEFAULT_BATCH_SIZE = 10
+
+
+# Larger photos are downscaled before upload; "low" detail doesn't use the extra pixels
+MAX_IMAGE_DIMENSION = 1024
+DOWNSCALE_JPEG_QUALITY = 85
+
+# Detections are reused for byte-identical uploads (e.g. client retries)
+VISION_CACHE_MAX_ENTRIES = 1024
+VISION_CACHE_TTL_SECONDS = 24 * 60 * 60
+
 
 class GPT4oVisionClient:
     """
@@ -59,17 +134,59 @@ class GPT4oVisionClient:
     for food item detection.
     """
 
+    # Transient 429/5xx errors are retried (with backoff) by the SDK
+    MAX_RETRIES = 3
+    TIMEOUT_SECONDS = 30.0
+
     def __init__(self):
-        """Initialize the OpenAI client."""
+        """Initialize the OpenAI clients."""
         self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+        # image content hash -> detected items
+        self._cache: TTLCache = TTLCache(
+            maxsize=VISION_CACHE_MAX_ENTRIES,
+            ttl=VISION_CACHE_TTL_SECONDS
+        )
+        # Cap in-flight calls (threads and event loop separately) and the call
+        # rate, so bursts queue here instead of hitting OpenAI's 429s
+        self._slots = threading.BoundedSemaphore(GPT4O_MAX_CONCURRENT)
+        self._async_slots = asyncio.BoundedSemaphore(GPT4O_MAX_CONCURRENT)
+        self._rate = TokenBucket(
+            rate=GPT4O_REQUESTS_PER_SECOND,
+            capacity=max(1, int(GPT4O_REQUESTS_PER_SECOND))
+        )
 
     @property
     def client(self) -> OpenAI:
         """Lazy initialization of OpenAI client."""
         if self._client is None:
-            self._client = OpenAI(api_key=get_openai_api_key())
+            self._client = OpenAI(
+                api_key=get_openai_api_key(),
+                max_retries=self.MAX_RETRIES,
+                timeout=self.TIMEOUT_SECONDS
+            )
         return self._client
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Lazy initialization of the async OpenAI client (for the event loop)."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=get_openai_api_key(),
+                max_retries=self.MAX_RETRIES,
+                timeout=self.TIMEOUT_SECONDS
+            )
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """Close the pooled OpenAI clients (app shutdown)."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
     def detect_food_items(self, image_bytes: bytes) -> List[DetectedFoodItem]:
         """
         Detect food items in an image using GPT-4o.
@@ -81,59 +198,287 @@ class GPT4oVisionClient:
             List of detected food items with names and categories
 
         Raises:
-            ValueError: If image cannot be processed
+            ValueError: If image is too large
             RuntimeError: If API call fails
         """
-        # Encode image to base64
-        base64_image = base64.b64encode(image_bytes).decode("utf-8")
+        self._check_size(image_bytes)
+        cache_key = self._cache_key(image_bytes)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
 
-        # Determine image type (default to jpeg)
-        image_type = self._detect_image_type(image_bytes)
+        try:
+            response = self._create(**self._request_kwargs(image_bytes))
+        except Exception as e:
+            raise RuntimeError(f"GPT-4o API error: {str(e)}")
+
+        items = self._parse_items(response.choices[0].message.content)
+        self._cache[cache_key] = tuple(items)
+        return items
+
+    def detect_food_items_batch(
+        self,
+        images: List[bytes],
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> List[List[DetectedFoodItem]]:
+        """
+        Detect food items in several images, packing up to batch_size images per request.
+
+        Images already in the cache are not re-sent.
+
+        Args:
+            images: Raw image bytes, one entry per image
+            batch_size: Maximum images per API call
+
+        Returns:
+            Detected items for each image, in the same order
+
+        Raises:
+            ValueError: If any image is too large
+            RuntimeError: If an API call fails
+        """
+        for image_bytes in images:
+            self._check_size(image_bytes)
+
+        cache_keys = [self._cache_key(image_bytes) for image_bytes in images]
+        results: List[Optional[List[DetectedFoodItem]]] = []
+        pending = []  # indexes of images that still need detection
+        for index, cache_key in enumerate(cache_keys):
+            cached = self._cache.get(cache_key)
+            if cached is None:
+                pending.append(index)
+                results.append(None)
+            else:
+                results.append(list(cached))
+
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            try:
+                response = self._create(
+                    **self._batch_request_kwargs([images[index] for index in chunk])
+                )
+            except Exception as e:
+                raise RuntimeError(f"GPT-4o API error: {str(e)}")
+
+            batch_items = self._parse_batch(response.choices[0].message.content, len(chunk))
+            for index, items in zip(chunk, batch_items):
+                self._cache[cache_keys[index]] = tuple(items)
+                results[index] = items
+
+        return results
+
+    async def adetect_food_items(self, image_bytes: bytes) -> List[DetectedFoodItem]:
+        """
+        Async variant of detect_food_items (does not block the event loop).
+
+        Args:
+            image_bytes: Raw image bytes (JPEG, PNG, etc.)
+
+        Returns:
+            List of detected food items with names and categories
+
+        Raises:
+            ValueError: If image is too large
+            RuntimeError: If API call fails
+        """
+        self._check_size(image_bytes)
+        cache_key = self._cache_key(image_bytes)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": DETECTION_PROMPT},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/{image_type};base64,{base64_image}",
-                                    "detail": "low"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=500
-            )
+            response = await self._acreate(**self._request_kwargs(image_bytes))
         except Exception as e:
             raise RuntimeError(f"GPT-4o API error: {str(e)}")
 
-        # Parse response
-        content = response.choices[0].message.content
+        items = self._parse_items(response.choices[0].message.content)
+        self._cache[cache_key] = tuple(items)
+        return items
+
+    async def adetect_food_items_many(self, images: List[bytes]) -> List[List[DetectedFoodItem]]:
+        """
+        Detect food items in several images concurrently.
+
+        Args:
+            images: Raw image bytes, one entry per image
+
+        Returns:
+            Detected items for each image, in the same order
+
+        Raises:
+            RuntimeError: If any API call fails
+        """
+        return list(await asyncio.gather(*(self.adetect_food_items(b) for b in images)))
+
+    def _create(self, **kwargs):
+        """Chat completion call, within the concurrency and rate limits."""
+        with self._slots:
+            self._rate.acquire()
+            return self.client.chat.completions.create(**kwargs)
+
+    async def _acreate(self, **kwargs):
+        """Async chat completion call, within the concurrency and rate limits."""
+        async with self._async_slots:
+            await self._rate.aacquire()
+            return await self.async_client.chat.completions.create(**kwargs)
+
+    def cache_clear(self) -> None:
+        """Drop all cached detections (e.g. for test isolation)."""
+        self._cache.clear()
+
+    def _check_size(self, image_bytes: bytes) -> None:
+        """Reject oversized uploads before any decoding or base64 work."""
+        if len(image_bytes) > MAX_IMAGE_BYTES:
+            raise ValueError(
+                f"Image is too large ({len(image_bytes) // (1024 * 1024)} MB). "
+                f"Maximum size is {MAX_IMAGE_BYTES // (1024 * 1024)} MB."
+            )
+
+    def _downscale(self, image_bytes: bytes) -> bytes:
+        """
+        Shrink images larger than MAX_IMAGE_DIMENSION on the long edge.
+
+        Returns the original bytes if the image is small enough or can't
+        be decoded here (the API is left to judge it).
+        """
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                if max(img.size) <= MAX_IMAGE_DIMENSION:
+                    return image_bytes
+                img.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.LANCZOS)
+                out = io.BytesIO()
+                img.convert("RGB").save(
+                    out, format="JPEG", quality=DOWNSCALE_JPEG_QUALITY, optimize=True
+                )
+                return out.getvalue()
+        except Exception:
+            return image_bytes
+
+    def _cache_key(self, image_bytes: bytes) -> bytes:
+        """Content hash of an image (BLAKE2b - fast, and plenty for a cache key)."""
+        return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+    def _image_part(self, image_bytes: bytes) -> dict:
+        """Message content part carrying one image as a base64 data URL."""
+        image_bytes = self._downscale(image_bytes)
+
+        # Determine image type (default to jpeg)
+        image_type = self._detect_image_type(image_bytes)
+
+        # Build the base64 data URL in one join; base64 output is pure ASCII
+        image_url = "".join((
+            "data:image/", image_type, ";base64,",
+            base64.b64encode(image_bytes).decode("ascii")
+        ))
+
+        return {
+            "type": "image_url",
+            "image_url": {
+                "url": image_url,
+                "detail": "low"
+            }
+        }
+
+    def _request_kwargs(self, image_bytes: bytes) -> dict:
+        """Chat completion arguments for a single-image detection request."""
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [_PROMPT_PART, self._image_part(image_bytes)]
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 500
+        }
+
+    def _batch_request_kwargs(self, images: List[bytes]) -> dict:
+        """Chat completion arguments for a multi-image detection request."""
+        prompt = DETECTION_PROMPT + BATCH_DETECTION_INSTRUCTIONS.format(count=len(images))
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt},
+                        *(self._image_part(image_bytes) for image_bytes in images)
+                    ]
+                }
+            ],
+            "response_format": {"type": "json_object"},
+            "max_tokens": 500 * len(images)
+        }
+
+    def _parse_items(self, content: Optional[str]) -> List[DetectedFoodItem]:
+        """
+        Parse the model's JSON reply into detected items.
+
+        Raises:
+            RuntimeError: If the reply is not valid JSON
+        """
         if not content:
             return []
 
         try:
-            result = json.loads(content)
-            items = result.get("items", [])
+            result = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            raise RuntimeError(f"Failed to parse GPT-4o response: {str(e)}")
 
-            return [
-                DetectedFoodItem(
-                    name=item.get("name", "unknown"),
-                    category=item.get("category")
-                )
-                for item in items
-                if item.get("name")
-            ]
-        except json.JSONDecodeError as e:
+        return self._build_items(result.get("items", []))
+
+    def _parse_batch(self, content: Optional[str], count: int) -> List[List[DetectedFoodItem]]:
+        """
+        Parse a multi-image reply into one item list per image.
+
+        Missing trailing or malformed entries are treated as images with
+        no detections.
+
+        Raises:
+            RuntimeError: If the reply is not a valid JSON object
+        """
+        if not content:
+            return [[] for _ in range(count)]
+
+        try:
+            result = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
             raise RuntimeError(f"Failed to parse GPT-4o response: {str(e)}")
 
+        if not isinstance(result, dict):
+            raise RuntimeError("Unexpected GPT-4o response format: expected a JSON object")
+
+        entries = result.get("results", [])[:count]
+        parsed = [
+            self._build_items(entry.get("items", [])) if isinstance(entry, dict) else []
+            for entry in entries
+        ]
+        parsed.extend([] for _ in range(count - len(parsed)))
+        return parsed
+
+    def _build_items(self, items: list) -> List[DetectedFoodItem]:
+        """
+        Build detected items from parsed JSON entries.
+
+        Nameless or wrongly typed entries (e.g. a non-string category) are
+        skipped, so one stray entry doesn't discard the rest of the reply.
+        """
+        detected = []
+        for entry in items:
+            if not isinstance(entry, dict) or not entry.get("name"):
+                continue
+            try:
+                item = _ITEM_ADAPTER.validate_python(entry)
+            except ValidationError:
+                continue
+            # Known categories resolve to the shared instance; anything else
+            # is passed through for the ingestion service to normalize
+            item.category = _CANONICAL_CATEGORIES.get(item.category, item.category)
+            detected.append(item)
+        return detected
+
     def _detect_image_type(self, image_bytes: bytes) -> str:
         """
         Detect image type from magic bytes.
@@ -144,17 +489,13 @@ class GPT4oVisionClient:
         Returns:
             Image type string (jpeg, png, gif, webp)
         """
-        if image_bytes[:3] == b"\xff\xd8\xff":
-            return "jpeg"
-        elif image_bytes[:8] == b"\x89PNG\r\n\x1a\n":
-            return "png"
-        elif image_bytes[:6] in (b"GIF87a", b"GIF89a"):
-            return "gif"
-        elif image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
-            return "webp"
-        else:
-            # Default to jpeg
-            return "jpeg"
+        if image_bytes.startswith(_KNOWN_PREFIXES):
+            image_type, prefix, marker = _SIGNATURES_BY_LEAD[image_bytes[:3]]
+            if marker is None or image_bytes.startswith(marker, 8):
+                return image_type
+
+        # Default to jpeg
+        return "jpeg"
 
 
 # Singleton instance
@@ -5,6 +5,7 @@ Orchestrates GPT-4o vision detection with category normalization
 and expiry prediction to produce draft-ready item data.
 """
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import List, Optional
 from datetime import date
 
@@ -17,7 +18,40 @@ from app.services.expiry_prediction import expiry_prediction_service
 GPT4O_DEFAULT_CONFIDENCE = 0.75
 
 
-@dataclass
+# GPT-4o category -> SnapShelf category. These should match the categories
+# in our prediction rules; unknown categories pass through unchanged
+CATEGORY_MAP = {
+    "dairy": "dairy",
+    "meat": "meat",
+    "poultry": "poultry",
+    "fish": "fish",
+    "seafood": "seafood",
+    "vegetables": "vegetables",
+    "fruits": "fruits",
+    "bread": "bakery",
+    "bakery": "bakery",
+    "eggs": "eggs",
+    "condiments": "condiments",
+    "beverages": "beverages",
+    "snacks": "snacks",
+    "frozen": "frozen",
+    "canned": "canned",
+    "other": None,  # No specific category, use fallback prediction
+}
+
+
+# Detections repeat a handful of category labels, so results are memoized
+@lru_cache(maxsize=128)
+def _normalize_category_cached(category: Optional[str]) -> Optional[str]:
+    """Map a raw GPT-4o category to a SnapShelf category (see CATEGORY_MAP)."""
+    if not category:
+        return None
+
+    category_lower = category.lower().strip()
+    return CATEGORY_MAP.get(category_lower, category_lower)
+
+
+@dataclass(slots=True)
 class DetectedItemWithPrediction:
     """Food item with expiry prediction, ready for draft creation."""
     name: str
@@ -27,7 +61,7 @@ class DetectedItemWithPrediction:
     reasoning: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class ImageIngestionResult:
     """Result of image-based food detection."""
     success: bool
@@ -64,7 +98,7 @@ class ImageIngestionService:
         # Step 1: Call GPT-4o Vision API
         try:
             raw_items = gpt4o_vision_client.detect_food_items(image_bytes)
-        except RuntimeError as e:
+        except (RuntimeError, ValueError) as e:
             return ImageIngestionResult(
                 success=False,
                 error_message=str(e)
@@ -75,6 +109,44 @@ class ImageIngestionService:
                 error_message=f"Unexpected error during image analysis: {str(e)}"
             )
 
+        return self._build_result(raw_items, storage_location)
+
+    async def ingest_from_image_async(
+        self,
+        image_bytes: bytes,
+        storage_location: str = "fridge"
+    ) -> ImageIngestionResult:
+        """
+        Async variant of ingest_from_image (awaits the vision call on the event loop).
+
+        Args:
+            image_bytes: Raw image file bytes
+            storage_location: Where items will be stored (fridge, freezer, pantry)
+
+        Returns:
+            ImageIngestionResult with detected items and predictions
+        """
+        try:
+            raw_items = await gpt4o_vision_client.adetect_food_items(image_bytes)
+        except (RuntimeError, ValueError) as e:
+            return ImageIngestionResult(
+                success=False,
+                error_message=str(e)
+            )
+        except Exception as e:
+            return ImageIngestionResult(
+                success=False,
+                error_message=f"Unexpected error during image analysis: {str(e)}"
+            )
+
+        return self._build_result(raw_items, storage_location)
+
+    def _build_result(
+        self,
+        raw_items: List[DetectedFoodItem],
+        storage_location: str
+    ) -> ImageIngestionResult:
+        """Normalize categories and predict expiry for detected items."""
         # Step 2: Check if any items were detected
         if not raw_items:
             return ImageIngestionResult(
@@ -116,33 +188,7 @@ class ImageIngestionService:
 
         Maps to categories used by expiry prediction rules.
         """
-        if not category:
-            return None
-
-        category_lower = category.lower().strip()
-
-        # Direct mappings for GPT-4o categories
-        # These should match the categories in our prediction rules
-        category_map = {
-            "dairy": "dairy",
-            "meat": "meat",
-            "poultry": "poultry",
-            "fish": "fish",
-            "seafood": "seafood",
-            "vegetables": "vegetables",
-            "fruits": "fruits",
-            "bread": "bakery",
-            "bakery": "bakery",
-            "eggs": "eggs",
-            "condiments": "condiments",
-            "beverages": "beverages",
-            "snacks": "snacks",
-            "frozen": "frozen",
-            "canned": "canned",
-            "other": None,  # No specific category, use fallback prediction
-        }
-
-        return category_map.get(category_lower, category_lower)
+        return _normalize_category_cached(category)
 
 
 # Singleton instance
@@ -4,13 +4,46 @@ Product lookup via Open Food Facts API.
 Open Food Facts is a free, open, crowdsourced database of food products
 from around the world. Perfect for looking up product info by barcode.
 """
-from typing import Optional
+from typing import Dict, List, Optional
 from dataclasses import dataclass
-import requests
+import re
+import logging
+import httpx
+import orjson
+from cachetools import TTLCache
 from datetime import date, timedelta
 
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+# Keyword rules mapping Open Food Facts categories to SnapShelf categories.
+# Order matters: the first category with a matching keyword wins.
+CATEGORY_KEYWORDS = {
+    "dairy": ["milk", "yogurt", "cheese", "dairy", "butter"],
+    "meat": ["meat", "beef", "pork", "chicken", "poultry"],
+    "fish": ["fish", "seafood", "salmon", "tuna"],
+    "fruits": ["fruit", "apple", "banana", "orange"],
+    "vegetables": ["vegetable", "carrot", "lettuce", "tomato"],
+    "bakery": ["bread", "bakery", "pastry"],
+    "eggs": ["egg"],
+    "frozen": ["frozen"],
+    "canned": ["canned", "preserved"],
+    "condiments": ["sauce", "condiment", "ketchup", "mustard"],
+}
+
+# All rules in one pattern: each alternative is a lookahead anchored at the
+# start, tried in rule order, so one search returns the highest-priority match
+# (as a named group) no matter where the keyword sits in the string.
+_CATEGORY_PATTERN = re.compile(
+    "^(?:" + "|".join(
+        f"(?=.*(?:{'|'.join(map(re.escape, keywords))}))(?P<{category}>)"
+        for category, keywords in CATEGORY_KEYWORDS.items()
+    ) + ")",
+    re.DOTALL
+)
+
+
+@dataclass(slots=True)
 class ProductInfo:
     """Product information retrieved from Open Food Facts"""
     barcode: str
@@ -31,6 +64,21 @@ class OpenFoodFactsClient:
     """
 
     BASE_URL = "https://world.openfoodfacts.org/api/v2/product"
+    SEARCH_URL = "https://world.openfoodfacts.org/api/v2/search"
+
+    # Only the fields _parse_product reads (keeps batch responses small)
+    SEARCH_FIELDS = "code,product_name,generic_name,abbreviated_product_name,brands,categories_tags,categories,image_url,quantity,packaging"
+
+    # Shared keep-alive pool: repeat lookups reuse the TCP/TLS connection
+    TIMEOUT_SECONDS = 5
+    MAX_KEEPALIVE_CONNECTIONS = 50
+    MAX_CONNECTIONS = 100
+
+    # Product data rarely changes; unknown barcodes are re-checked sooner
+    # since they may be added to the crowdsourced database
+    CACHE_MAX_ENTRIES = 10_000
+    CACHE_TTL_SECONDS = 60 * 60
+    NOT_FOUND_CACHE_TTL_SECONDS = 10 * 60
 
     def __init__(self, user_agent: str = "SnapShelf/0.1"):
         """
@@ -39,12 +87,39 @@ class OpenFoodFactsClient:
         Args:
             user_agent: Custom user agent (polite API usage)
         """
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": user_agent
-        })
+        self.user_agent = user_agent
+        self._client: Optional[httpx.AsyncClient] = None
+        self._products: TTLCache = TTLCache(
+            maxsize=self.CACHE_MAX_ENTRIES,
+            ttl=self.CACHE_TTL_SECONDS
+        )
+        self._not_found: TTLCache = TTLCache(
+            maxsize=self.CACHE_MAX_ENTRIES,
+            ttl=self.NOT_FOUND_CACHE_TTL_SECONDS
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Lazy-load the pooled async HTTP client."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                headers={"User-Agent": self.user_agent},
+                timeout=self.TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+                    max_connections=self.MAX_CONNECTIONS
+                )
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client (app shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
-    def lookup_product(self, barcode: str) -> Optional[ProductInfo]:
+    async def lookup_product(self, barcode: str) -> Optional[ProductInfo]:
         """
         Look up product by barcode.
 
@@ -52,41 +127,111 @@ class OpenFoodFactsClient:
             barcode: Product barcode (EAN-13, UPC-A, etc.)
 
         Returns:
-            ProductInfo if found, None if not in database
-
-        Raises:
-            requests.RequestException: If API request fails
+            ProductInfo if found, None if not in database or the API request fails
         """
+        cached = self._products.get(barcode)
+        if cached is not None:
+            return cached
+        if barcode in self._not_found:
+            return None
+
         url = f"{self.BASE_URL}/{barcode}.json"
 
         try:
-            response = self.session.get(url, timeout=10)
+            response = await self.client.get(url)
+
+            # Unknown barcodes come back as 404 (or status 0) - remember the miss
+            if response.status_code == 404:
+                self._not_found[barcode] = True
+                return None
+
             response.raise_for_status()
 
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # Check if product was found
             if data.get("status") != 1:
+                self._not_found[barcode] = True
                 return None
 
-            product = data.get("product", {})
-
-            # Extract relevant fields
-            return ProductInfo(
-                barcode=barcode,
-                name=self._get_product_name(product),
-                brand=product.get("brands"),
-                category=self._get_category(product),
-                image_url=product.get("image_url"),
-                quantity=product.get("quantity"),
-                packaging=product.get("packaging")
-            )
+            product_info = self._parse_product(barcode, data.get("product", {}))
 
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             # Log error but don't crash - barcode lookup is not critical
-            print(f"Open Food Facts API error: {e}")
+            # (errors are not cached, the next scan retries)
+            logger.warning("Open Food Facts API error for %s: %s", barcode, e)
             return None
 
+        self._products[barcode] = product_info
+        return product_info
+
+    async def lookup_products(self, barcodes: List[str]) -> Dict[str, Optional[ProductInfo]]:
+        """
+        Look up several barcodes with a single search-by-codes request.
+
+        Cached barcodes are answered locally; the rest are fetched in one
+        round-trip instead of one request per barcode.
+
+        Args:
+            barcodes: Product barcodes
+
+        Returns:
+            Mapping of each barcode to its ProductInfo (None if not found)
+        """
+        found: Dict[str, Optional[ProductInfo]] = {}
+        pending = []
+        for barcode in dict.fromkeys(barcodes):
+            if barcode in self._products:
+                found[barcode] = self._products[barcode]
+            elif barcode in self._not_found:
+                found[barcode] = None
+            else:
+                pending.append(barcode)
+
+        if pending:
+            try:
+                response = await self.client.get(self.SEARCH_URL, params={
+                    "code": ",".join(pending),
+                    "fields": self.SEARCH_FIELDS,
+                    "page_size": len(pending)
+                })
+                response.raise_for_status()
+                products = orjson.loads(response.content).get("products", [])
+            except (httpx.HTTPError, ValueError) as e:
+                # Not cached - the next scan retries
+                logger.warning("Open Food Facts batch lookup error for %d barcodes: %s", len(pending), e)
+                products = None
+
+            if products is None:
+                found.update(dict.fromkeys(pending))
+            else:
+                for product in products:
+                    barcode = product.get("code")
+                    if barcode in pending:
+                        product_info = self._parse_product(barcode, product)
+                        self._products[barcode] = product_info
+                        found[barcode] = product_info
+
+                # Codes missing from the response aren't in the database
+                for barcode in pending:
+                    if barcode not in found:
+                        self._not_found[barcode] = True
+                        found[barcode] = None
+
+        return {barcode: found[barcode] for barcode in barcodes}
+
+    def _parse_product(self, barcode: str, product: dict) -> ProductInfo:
+        """Extract the fields SnapShelf uses from an API product object."""
+        return ProductInfo(
+            barcode=barcode,
+            name=self._get_product_name(product),
+            brand=product.get("brands"),
+            category=self._get_category(product),
+            image_url=product.get("image_url"),
+            quantity=product.get("quantity"),
+            packaging=product.get("packaging")
+        )
+
     def _get_product_name(self, product: dict) -> str:
         """
         Extract best product name from API response.
@@ -133,32 +278,13 @@ class OpenFoodFactsClient:
         Maps detailed OFF categories to our simpler category system
         used by expiry prediction.
         """
-        category_lower = category.lower()
-
-        # Mapping rules (can be expanded)
-        if any(word in category_lower for word in ["milk", "yogurt", "cheese", "dairy", "butter"]):
-            return "dairy"
-        elif any(word in category_lower for word in ["meat", "beef", "pork", "chicken", "poultry"]):
-            return "meat"
-        elif any(word in category_lower for word in ["fish", "seafood", "salmon", "tuna"]):
-            return "fish"
-        elif any(word in category_lower for word in ["fruit", "apple", "banana", "orange"]):
-            return "fruits"
-        elif any(word in category_lower for word in ["vegetable", "carrot", "lettuce", "tomato"]):
-            return "vegetables"
-        elif any(word in category_lower for word in ["bread", "bakery", "pastry"]):
-            return "bakery"
-        elif any(word in category_lower for word in ["egg"]):
-            return "eggs"
-        elif any(word in category_lower for word in ["frozen"]):
-            return "frozen"
-        elif any(word in category_lower for word in ["canned", "preserved"]):
-            return "canned"
-        elif any(word in category_lower for word in ["sauce", "condiment", "ketchup", "mustard"]):
-            return "condiments"
-        else:
-            # Return original if no match
-            return category
+        # Mapping rules live in CATEGORY_KEYWORDS (can be expanded)
+        match = _CATEGORY_PATTERN.match(category.lower())
+        if match:
+            return match.lastgroup
+
+        # Return original if no match
+        return category
 
 
 # Singleton instance
@@ -6,11 +6,19 @@ prioritizing items near expiration to reduce food waste.
 
 Core value: "What should I cook right now so food doesn't go to waste?"
 """
-import json
-from datetime import date, datetime
-from typing import List, Optional, Literal
-
-from openai import OpenAI
+import asyncio
+import hashlib
+import logging
+from datetime import date
+from functools import lru_cache
+from operator import itemgetter
+from typing import AsyncIterator, Dict, List, Optional, Literal, Tuple, Union
+
+import httpx
+import orjson
+from cachetools import TTLCache
+from openai import AsyncOpenAI, OpenAI
+from pydantic import ValidationError
 
 from app.core.config import get_openai_api_key
 from app.schemas.recipe import (
@@ -21,21 +29,19 @@ from app.schemas.recipe import (
 )
 
 
-RECIPE_GENERATION_PROMPT = """You are the recipe recommendation engine for SnapShelf, a fridge-tracking app focused on reducing food waste.
+logger = logging.getLogger(__name__)
 
-Your primary goal is NOT creativity or variety.
-Your primary goal is to recommend practical recipes that USE FOOD BEFORE IT EXPIRES.
 
-MODE: {mode}
-{mode_instructions}
+# Static instructions, sent first as the system message. Nothing request-specific
+# may appear here: OpenAI's automatic prompt caching only matches an identical
+# prefix, so this block is billed (and prefilled) at the cached rate on repeat calls.
+PROMPT_PREFIX = """You are the recipe recommendation engine for SnapShelf, a fridge-tracking app focused on reducing food waste.
 
-TIME PREFERENCE: {time_preference}
-TARGET SERVINGS: {servings}
-
-USER'S INVENTORY:
-{ingredients_json}
+Your primary goal is NOT creativity or variety.
+Your primary goal is to recommend practical recipes that USE FOOD BEFORE IT EXPIRES.
 
-Generate EXACTLY {max_recipes} recipes. You MUST return exactly {max_recipes} recipes, no more, no less.
+The user message gives the MODE, TIME PREFERENCE, TARGET SERVINGS, the user's inventory and how many recipes to generate.
+You MUST return exactly the requested number of recipes, no more, no less.
 
 RANKING PRIORITY:
 1. Waste reduction impact (recipes using most expiring items rank higher)
@@ -49,44 +55,95 @@ RULES (NON-NEGOTIABLE):
 - Keep additional required ingredients minimal
 - If time_preference is "quick", recipes should be under 30 minutes
 - If time_preference is "normal", recipes should be 30-60 minutes
-- All recipes must serve approximately {servings} portions
-
-OUTPUT FORMAT - Return a JSON object with this exact structure:
-{{
-  "recipes": [
-    {{
-      "title": "Recipe Name",
-      "description": "1-2 sentence appetizing description",
-      "cooking_time_minutes": 30,
-      "servings": {servings},
-      "difficulty": "easy|medium|hard",
-      "recommendation_reason": "Uses 3 items expiring in the next 2 days",
-      "ingredients": [
-        {{
-          "name": "ingredient name",
-          "quantity": "2 cups",
-          "from_inventory": true,
-          "is_expiring_soon": true,
-          "days_until_expiry": 2
-        }}
-      ],
-      "instructions": ["Step 1...", "Step 2..."],
-      "tips": "Optional tip or null"
-    }}
-  ],
-  "ingredients_used": ["list of inventory ingredient names used"],
-  "ingredients_missing": ["pantry staples needed that weren't in inventory"]
-}}
+- All recipes must serve approximately TARGET SERVINGS portions
+
+Return a JSON object matching the provided response schema.
+
+For each recipe, "servings" is the TARGET SERVINGS.
 
 For each ingredient:
 - from_inventory: true if from user's inventory
 - is_expiring_soon: true if expiring within 3 days
-- days_until_expiry: number of days until expiry (only for inventory items)
+- days_until_expiry: number of days until expiry (null for items not from inventory)
 
 The recommendation_reason MUST explain WHY this recipe was recommended, focusing on waste reduction.
 Examples: "Uses chicken expiring tomorrow and spinach expiring in 2 days", "Clears 4 items expiring this week"
 """
 
+# Structured Outputs schema: the API guarantees replies match it, so the
+# prompt does not need to spell out the JSON layout. Strict mode requires
+# every property to be listed in "required" (nullable fields use a null type).
+_RECIPE_INGREDIENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "quantity": {"type": "string", "description": "e.g. \"2 cups\""},
+        "from_inventory": {"type": "boolean"},
+        "is_expiring_soon": {"type": "boolean"},
+        "days_until_expiry": {"type": ["integer", "null"]},
+    },
+    "required": ["name", "quantity", "from_inventory", "is_expiring_soon", "days_until_expiry"],
+    "additionalProperties": False,
+}
+
+_RECIPE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string", "description": "1-2 sentence appetizing description"},
+        "cooking_time_minutes": {"type": "integer"},
+        "servings": {"type": "integer"},
+        "difficulty": {"type": "string", "enum": ["easy", "medium", "hard"]},
+        "recommendation_reason": {"type": "string"},
+        "ingredients": {"type": "array", "items": _RECIPE_INGREDIENT_SCHEMA},
+        "instructions": {"type": "array", "items": {"type": "string"}},
+        "tips": {"type": ["string", "null"]},
+    },
+    "required": [
+        "title", "description", "cooking_time_minutes", "servings", "difficulty",
+        "recommendation_reason", "ingredients", "instructions", "tips",
+    ],
+    "additionalProperties": False,
+}
+
+RECIPE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "recipe_suggestions",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "recipes": {"type": "array", "items": _RECIPE_SCHEMA},
+                "ingredients_used": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Inventory ingredient names used",
+                },
+                "ingredients_missing": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Pantry staples needed that weren't in inventory",
+                },
+            },
+            "required": ["recipes", "ingredients_used", "ingredients_missing"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# Request-specific part, sent last as the user message
+PROMPT_SUFFIX = """MODE: {mode}
+{mode_instructions}
+
+TIME PREFERENCE: {time_preference}
+TARGET SERVINGS: {servings}
+
+USER'S INVENTORY:
+{ingredients_json}
+
+Generate EXACTLY {max_recipes} recipes."""
+
 MODE_AUTO_INSTRUCTIONS = """AUTO MODE - "What should I cook?"
 - Automatically prioritize ingredients closest to expiration
 - Prefer recipes that use multiple expiring items together
@@ -100,6 +157,45 @@ MODE_MANUAL_INSTRUCTIONS = """MANUAL MODE - "User selected specific ingredients"
 - This is a strict requirement - if user selected chicken, do NOT add beef or other meats"""
 
 
+# PROMPT_SUFFIX split around the inventory, the only high-cardinality placeholder
+_SUFFIX_HEAD, _SUFFIX_TAIL = PROMPT_SUFFIX.split("{ingredients_json}")
+
+
+@lru_cache(maxsize=256)
+def _render_prompt_parts(
+    mode: str,
+    selected_names: Tuple[str, ...],
+    time_preference: str,
+    servings: int,
+    max_recipes: int
+) -> Tuple[str, str]:
+    """
+    Render the text before and after the inventory in PROMPT_SUFFIX.
+
+    These inputs take few distinct values, so each combination is
+    formatted once and reused.
+    """
+    if mode == "manual" and selected_names:
+        mode_instructions = MODE_MANUAL_INSTRUCTIONS.format(
+            selected_names=", ".join(selected_names)
+        )
+    else:
+        mode_instructions = MODE_AUTO_INSTRUCTIONS
+
+    head = _SUFFIX_HEAD.format(
+        mode=mode.upper(),
+        mode_instructions=mode_instructions,
+        time_preference=time_preference,
+        servings=servings
+    )
+    return head, _SUFFIX_TAIL.format(max_recipes=max_recipes)
+
+
+# Generated recipes are reused for identical requests within this window
+RECIPE_CACHE_MAX_ENTRIES = 512
+RECIPE_CACHE_TTL_SECONDS = 60 * 60
+
+
 class RecipeGenerationService:
     """
     Service for generating recipe suggestions using OpenAI.
@@ -107,27 +203,116 @@ class RecipeGenerationService:
     Core value: Recommend practical recipes that use food before it expires.
     """
 
+    # Pooled HTTP/2 transport for OpenAI (keep-alive across generations)
+    TIMEOUT_SECONDS = 60.0
+    CONNECT_TIMEOUT_SECONDS = 5.0
+    MAX_KEEPALIVE_CONNECTIONS = 50
+    MAX_CONNECTIONS = 100
+
     def __init__(self):
         self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
+        self._response_cache: TTLCache = TTLCache(
+            maxsize=RECIPE_CACHE_MAX_ENTRIES,
+            ttl=RECIPE_CACHE_TTL_SECONDS
+        )
 
     @property
     def client(self) -> OpenAI:
         """Lazy initialization of OpenAI client."""
         if self._client is None:
-            self._client = OpenAI(api_key=get_openai_api_key())
+            self._client = OpenAI(
+                api_key=get_openai_api_key(),
+                http_client=httpx.Client(http2=True, **self._http_options())
+            )
         return self._client
 
-    def _calculate_days_until_expiry(self, expiry_date_str: Optional[str]) -> Optional[int]:
-        """Calculate days until expiry from ISO date string."""
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Lazy initialization of the async OpenAI client (for the event loop)."""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=get_openai_api_key(),
+                http_client=httpx.AsyncClient(http2=True, **self._http_options())
+            )
+        return self._async_client
+
+    def _http_options(self) -> dict:
+        """Timeout and pool limits shared by the sync and async transports."""
+        return {
+            "timeout": httpx.Timeout(self.TIMEOUT_SECONDS, connect=self.CONNECT_TIMEOUT_SECONDS),
+            "limits": httpx.Limits(
+                max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=self.MAX_CONNECTIONS
+            ),
+        }
+
+    async def aclose(self) -> None:
+        """Close the pooled OpenAI clients (app shutdown)."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _calculate_days_until_expiry(
+        self,
+        expiry_date_str: Optional[str],
+        today: Optional[date] = None
+    ) -> Optional[int]:
+        """Calculate days until expiry from ISO date string (relative to today)."""
         if not expiry_date_str:
             return None
         try:
-            expiry = datetime.strptime(expiry_date_str, "%Y-%m-%d").date()
-            today = date.today()
-            return (expiry - today).days
+            expiry = date.fromisoformat(expiry_date_str)
+            return (expiry - (today or date.today())).days
         except (ValueError, TypeError):
             return None
 
+    def _cache_key(
+        self,
+        ingredients: List[IngredientInput],
+        max_recipes: int,
+        mode: str,
+        selected_ingredient_names: Optional[List[str]],
+        time_preference: str,
+        servings: int
+    ) -> str:
+        """
+        Fingerprint a generation request.
+
+        Ingredient order and name casing do not matter. Today's date is part
+        of the key because days-until-expiry (and so the prompt) depends on it.
+        Selected names only reach the prompt in manual mode (and manual mode
+        without a selection renders as auto), so they are ignored otherwise.
+        """
+        inventory = sorted(
+            (ing.name.strip().lower(), str(ing.quantity), ing.unit or "", ing.expiry_date or "")
+            for ing in ingredients
+        )
+        if mode == "manual" and selected_ingredient_names:
+            selected = sorted(name.strip().lower() for name in selected_ingredient_names)
+        else:
+            mode, selected = "auto", []
+        payload = {
+            "ing": inventory,
+            "sel": selected,
+            "mode": mode,
+            "t": time_preference,
+            "s": servings,
+            "n": max_recipes,
+            "day": date.today().isoformat(),
+        }
+        return hashlib.blake2b(orjson.dumps(payload), digest_size=16).hexdigest()
+
+    def _cached_response(self, cache_key: str) -> Optional[RecipeGenerationResponse]:
+        """Return a cached result for this key, if any (hits are logged at debug level)."""
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Recipe cache hit (%d entries cached)", len(self._response_cache))
+        return cached
+
     def generate_recipes(
         self,
         ingredients: List[IngredientInput],
@@ -135,7 +320,8 @@ class RecipeGenerationService:
         mode: Literal["auto", "manual"] = "auto",
         selected_ingredient_names: Optional[List[str]] = None,
         time_preference: Literal["quick", "normal", "any"] = "any",
-        servings: int = 2
+        servings: int = 2,
+        use_cache: bool = True
     ) -> RecipeGenerationResponse:
         """
         Generate recipe suggestions based on available ingredients.
@@ -147,6 +333,7 @@ class RecipeGenerationService:
             selected_ingredient_names: Required ingredients for manual mode
             time_preference: "quick" (<30min), "normal" (30-60min), "any"
             servings: Target number of servings (1-6)
+            use_cache: Reuse a recent result for an identical request
 
         Returns:
             RecipeGenerationResponse with recipe suggestions
@@ -154,100 +341,382 @@ class RecipeGenerationService:
         Raises:
             RuntimeError: If API call fails
         """
-        # Calculate days until expiry and sort by urgency
-        ingredients_data = []
+        cache_key = self._cache_key(
+            ingredients, max_recipes, mode, selected_ingredient_names, time_preference, servings
+        )
+        if use_cache:
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+
+        request_kwargs = self._request_kwargs(
+            ingredients, max_recipes, mode, selected_ingredient_names, time_preference, servings
+        )
+        try:
+            response = self.client.chat.completions.create(**request_kwargs)
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+
+        return self._handle_response(response, cache_key)
+
+    async def agenerate_recipes(
+        self,
+        ingredients: List[IngredientInput],
+        max_recipes: int = 3,
+        mode: Literal["auto", "manual"] = "auto",
+        selected_ingredient_names: Optional[List[str]] = None,
+        time_preference: Literal["quick", "normal", "any"] = "any",
+        servings: int = 2,
+        use_cache: bool = True
+    ) -> RecipeGenerationResponse:
+        """
+        Async variant of generate_recipes.
+
+        Awaits the OpenAI call instead of blocking, so one worker can have
+        many generations in flight at once.
+
+        Raises:
+            RuntimeError: If API call fails
+        """
+        cache_key = self._cache_key(
+            ingredients, max_recipes, mode, selected_ingredient_names, time_preference, servings
+        )
+        if use_cache:
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                return cached
+
+        request_kwargs = self._request_kwargs(
+            ingredients, max_recipes, mode, selected_ingredient_names, time_preference, servings
+        )
+        try:
+            response = await self.async_client.chat.completions.create(**request_kwargs)
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+
+        return self._handle_response(response, cache_key)
+
+    async def astream_recipes(
+        self,
+        ingredients: List[IngredientInput],
+        max_recipes: int = 3,
+        mode: Literal["auto", "manual"] = "auto",
+        selected_ingredient_names: Optional[List[str]] = None,
+        time_preference: Literal["quick", "normal", "any"] = "any",
+        servings: int = 2,
+        use_cache: bool = True
+    ) -> AsyncIterator[Union[str, RecipeGenerationResponse]]:
+        """
+        Stream a recipe generation as it is produced.
+
+        Yields raw JSON text deltas as they arrive from OpenAI, then the
+        parsed RecipeGenerationResponse as the final item. A cache hit
+        yields only the parsed response.
+
+        RuntimeError is the only exception this generator raises: API and
+        stream errors are wrapped here, and _handle_content wraps parse
+        errors. Callers relaying the stream to a client need catch only it.
+
+        Raises:
+            RuntimeError: If the API call fails or the reply can't be parsed
+        """
+        cache_key = self._cache_key(
+            ingredients, max_recipes, mode, selected_ingredient_names, time_preference, servings
+        )
+        if use_cache:
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        request_kwargs = self._request_kwargs(
+            ingredients, max_recipes, mode, selected_ingredient_names, time_preference, servings
+        )
+        parts = []
+        try:
+            stream = await self.async_client.chat.completions.create(
+                **request_kwargs,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async for chunk in stream:
+                # The final chunk carries usage only, with no choices
+                if chunk.usage is not None:
+                    self._log_usage(chunk)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+
+        yield self._handle_content("".join(parts), cache_key)
+
+    async def agenerate_recipes_many(
+        self,
+        ingredient_sets: List[List[IngredientInput]],
+        **options
+    ) -> List[RecipeGenerationResponse]:
+        """
+        Generate recipes for several ingredient sets concurrently.
+
+        Args:
+            ingredient_sets: One ingredient list per generation
+            **options: Passed through to agenerate_recipes for every set
+
+        Returns:
+            One response per ingredient set, in the same order
+
+        Raises:
+            RuntimeError: If any API call fails
+        """
+        return list(await asyncio.gather(
+            *(self.agenerate_recipes(ingredients, **options) for ingredients in ingredient_sets)
+        ))
+
+    def submit_recipe_batch(self, jobs: List[Tuple[List[IngredientInput], dict]]) -> str:
+        """
+        Queue recipe generations on the OpenAI Batch API (half price, results within 24h).
+
+        For non-interactive work such as scheduled meal plans; results are
+        not cached since nobody is waiting on them.
+
+        Args:
+            jobs: (ingredients, options) pairs; options are the generate_recipes
+                keyword arguments (max_recipes, mode, selected_ingredient_names,
+                time_preference, servings)
+
+        Returns:
+            Batch ID, to pass to collect_recipe_batch. Results are keyed by
+            "job-<index>" in the order of jobs.
+
+        Raises:
+            RuntimeError: If the upload or batch creation fails
+        """
+        lines = []
+        for index, (ingredients, options) in enumerate(jobs):
+            body = self._request_kwargs(
+                ingredients,
+                options.get("max_recipes", 3),
+                options.get("mode", "auto"),
+                options.get("selected_ingredient_names"),
+                options.get("time_preference", "any"),
+                options.get("servings", 2)
+            )
+            lines.append(orjson.dumps({
+                "custom_id": f"job-{index}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }))
+
+        try:
+            input_file = self.client.files.create(
+                file=("recipe_batch.jsonl", b"\n".join(lines)),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+
+        return batch.id
+
+    def collect_recipe_batch(self, batch_id: str) -> Optional[Dict[str, RecipeGenerationResponse]]:
+        """
+        Fetch the results of a batch queued with submit_recipe_batch.
+
+        Args:
+            batch_id: ID returned by submit_recipe_batch
+
+        Returns:
+            Parsed responses keyed by custom_id (failed jobs are logged and
+            omitted), or None if the batch is still running
+
+        Raises:
+            RuntimeError: If the batch failed, expired or was cancelled
+        """
+        try:
+            batch = self.client.batches.retrieve(batch_id)
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"Recipe batch {batch_id} {batch.status}")
+        if batch.status != "completed":
+            return None
+
+        try:
+            output = self.client.files.content(batch.output_file_id).content
+        except Exception as e:
+            raise RuntimeError(f"OpenAI API error: {str(e)}")
+
+        results = {}
+        for line in output.splitlines():
+            if not line:
+                continue
+            record = orjson.loads(line)
+            custom_id = record.get("custom_id")
+            try:
+                content = record["response"]["body"]["choices"][0]["message"]["content"]
+                results[custom_id] = self._parse_response(orjson.loads(content))
+            except (KeyError, IndexError, TypeError, orjson.JSONDecodeError) as e:
+                logger.warning("Recipe batch %s: job %s failed: %s", batch_id, custom_id, e)
+        return results
+
+    def _request_kwargs(
+        self,
+        ingredients: List[IngredientInput],
+        max_recipes: int,
+        mode: str,
+        selected_ingredient_names: Optional[List[str]],
+        time_preference: str,
+        servings: int
+    ) -> dict:
+        """Build the chat completion arguments shared by the sync and async paths."""
+        # Calculate days until expiry, collapsing duplicates (e.g. the same
+        # item scanned twice): keep the earliest expiry and add quantities
+        # when the units match
+        today = date.today()
+        merged: Dict[str, dict] = {}
         for ing in ingredients:
-            days_until = self._calculate_days_until_expiry(ing.expiry_date)
+            days_until = self._calculate_days_until_expiry(ing.expiry_date, today)
+            key = ing.name.strip().lower()
+            seen = merged.get(key)
+            if seen is None:
+                merged[key] = {
+                    "name": ing.name,
+                    "quantity": ing.quantity,
+                    "unit": ing.unit,
+                    "expiry_date": ing.expiry_date,
+                    "days_until_expiry": days_until
+                }
+                continue
+
+            if days_until is not None and (
+                seen["days_until_expiry"] is None or days_until < seen["days_until_expiry"]
+            ):
+                seen["expiry_date"] = ing.expiry_date
+                seen["days_until_expiry"] = days_until
+            if seen["quantity"] and ing.quantity and seen["unit"] == ing.unit:
+                seen["quantity"] += ing.quantity
+
+        # (sort key, item) pairs; the urgency key is computed once per item
+        keyed = []
+        for entry in merged.values():
+            days_until = entry["days_until_expiry"]
 
             item = {
-                "name": ing.name,
+                "name": entry["name"],
                 "days_until_expiry": days_until,
                 "is_expiring_soon": days_until is not None and days_until <= 3
             }
 
-            if ing.quantity and ing.unit:
-                item["quantity"] = f"{ing.quantity} {ing.unit}"
-            elif ing.quantity:
-                item["quantity"] = str(ing.quantity)
+            if entry["quantity"] and entry["unit"]:
+                item["quantity"] = f"{entry['quantity']} {entry['unit']}"
+            elif entry["quantity"]:
+                item["quantity"] = str(entry["quantity"])
             else:
                 item["quantity"] = "available"
 
-            if ing.expiry_date:
-                item["expiry_date"] = ing.expiry_date
+            if entry["expiry_date"]:
+                item["expiry_date"] = entry["expiry_date"]
 
-            ingredients_data.append(item)
+            # Items with expiry first, most urgent first
+            sort_key = (True, 0) if days_until is None else (False, days_until)
+            keyed.append((sort_key, item))
 
         # Sort by urgency (most urgent first, then items without expiry)
-        ingredients_data.sort(
-            key=lambda x: (
-                x["days_until_expiry"] is None,  # Items with expiry first
-                x["days_until_expiry"] if x["days_until_expiry"] is not None else 999
-            )
-        )
-
-        # Build mode instructions
-        if mode == "manual" and selected_ingredient_names:
-            mode_instructions = MODE_MANUAL_INSTRUCTIONS.format(
-                selected_names=", ".join(selected_ingredient_names)
-            )
-        else:
-            mode_instructions = MODE_AUTO_INSTRUCTIONS
-
-        prompt = RECIPE_GENERATION_PROMPT.format(
-            mode=mode.upper(),
-            mode_instructions=mode_instructions,
-            time_preference=time_preference,
-            servings=servings,
-            ingredients_json=json.dumps(ingredients_data, indent=2),
-            max_recipes=max_recipes
+        keyed.sort(key=itemgetter(0))
+        ingredients_data = [item for _, item in keyed]
+
+        head, tail = _render_prompt_parts(
+            mode,
+            tuple(selected_ingredient_names or ()),
+            time_preference,
+            servings,
+            max_recipes
         )
+        prompt = "".join((head, orjson.dumps(ingredients_data).decode(), tail))
+
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": PROMPT_PREFIX},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": RECIPE_RESPONSE_FORMAT,
+            "max_tokens": 2500,
+            "temperature": 0.7,
+        }
+
+    def _handle_response(self, response, cache_key: str) -> RecipeGenerationResponse:
+        """Log usage, parse the completion and cache the result."""
+        self._log_usage(response)
+        return self._handle_content(response.choices[0].message.content, cache_key)
+
+    def _handle_content(self, content: Optional[str], cache_key: str) -> RecipeGenerationResponse:
+        """
+        Parse completion text and cache the result.
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                max_tokens=2500,
-                temperature=0.7
-            )
-        except Exception as e:
-            raise RuntimeError(f"OpenAI API error: {str(e)}")
-
-        content = response.choices[0].message.content
+        Raises:
+            RuntimeError: If the reply is empty, not JSON, or not recipe-shaped
+        """
         if not content:
             raise RuntimeError("Empty response from OpenAI")
 
         try:
-            result = json.loads(content)
-            return self._parse_response(result)
-        except json.JSONDecodeError as e:
+            result = orjson.loads(content)
+            parsed = self._parse_response(result)
+        except (orjson.JSONDecodeError, AttributeError, TypeError, ValidationError) as e:
             raise RuntimeError(f"Failed to parse response: {str(e)}")
 
+        self._response_cache[cache_key] = parsed
+        return parsed
+
+    def _log_usage(self, response) -> None:
+        """Log token usage; cached_tokens shows whether the prompt prefix hit OpenAI's cache."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        logger.info(
+            "Recipe generation usage: prompt=%s completion=%s cached=%s",
+            usage.prompt_tokens,
+            usage.completion_tokens,
+            getattr(details, "cached_tokens", 0) or 0
+        )
+
     def _parse_response(self, data: dict) -> RecipeGenerationResponse:
         """Parse raw LLM response into typed response object."""
-        recipes = []
-        for recipe_data in data.get("recipes", []):
-            ingredients = []
-            for ing in recipe_data.get("ingredients", []):
-                ingredients.append(RecipeIngredient(
-                    name=ing.get("name", ""),
-                    quantity=ing.get("quantity", ""),
-                    from_inventory=ing.get("from_inventory", False),
-                    is_expiring_soon=ing.get("is_expiring_soon", False),
-                    days_until_expiry=ing.get("days_until_expiry")
-                ))
-
-            recipes.append(RecipeResponse(
+        recipes = [
+            RecipeResponse(
                 title=recipe_data.get("title", "Untitled Recipe"),
                 description=recipe_data.get("description", ""),
                 cooking_time_minutes=recipe_data.get("cooking_time_minutes", 30),
                 servings=recipe_data.get("servings", 2),
                 difficulty=recipe_data.get("difficulty", "medium"),
-                ingredients=ingredients,
+                ingredients=[
+                    RecipeIngredient(
+                        name=ing.get("name", ""),
+                        quantity=ing.get("quantity", ""),
+                        from_inventory=ing.get("from_inventory", False),
+                        is_expiring_soon=ing.get("is_expiring_soon", False),
+                        days_until_expiry=ing.get("days_until_expiry")
+                    )
+                    for ing in recipe_data.get("ingredients", [])
+                ],
                 instructions=recipe_data.get("instructions", []),
                 tips=recipe_data.get("tips"),
                 recommendation_reason=recipe_data.get("recommendation_reason", "")
-            ))
+            )
+            for recipe_data in data.get("recipes", [])
+        ]
 
         return RecipeGenerationResponse(
             recipes=recipes,
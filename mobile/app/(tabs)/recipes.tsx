@@ -187,6 +187,7 @@ export default function RecipesScreen() {
     // Capture current mode to ensure correct state update
     const currentMode = mode;
     const currentSetRecipes = currentMode === 'expiring' ? setExpiringRecipes : setManualRecipes;
+    const isRegenerate = recipes.length > 0;
 
     setGenerating(true);
     currentSetRecipes([]);
@@ -214,7 +215,7 @@ export default function RecipesScreen() {
         selected_ingredient_names: selectedNames,
         time_preference: timePreference,
         servings: servings,
-      });
+      }, isRegenerate);
       currentSetRecipes(response.recipes);
     } catch (error: any) {
       Alert.alert('Error', error.message);
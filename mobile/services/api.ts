@@ -257,10 +257,19 @@ class ApiService {
   }
 
   // Recipe endpoints
-  async generateRecipes(request: RecipeGenerationRequest): Promise<RecipeGenerationResponse> {
+  async generateRecipes(
+    request: RecipeGenerationRequest,
+    regenerate: boolean = false
+  ): Promise<RecipeGenerationResponse> {
+    const headers = await this.getHeaders();
+    if (regenerate) {
+      // Bypass the server-side cache so the user gets new suggestions
+      headers['Cache-Control'] = 'no-cache';
+    }
+
     const response = await fetch(`${API_BASE_URL}/api/recipes/generate`, {
       method: 'POST',
-      headers: await this.getHeaders(),
+      headers,
       body: JSON.stringify(request),
     });
 
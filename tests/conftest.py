@@ -0,0 +1,10 @@
+"""
+Shared pytest configuration.
+"""
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "parallel: mock-isolated tests with no shared state, safe to run under pytest-xdist (-n auto)"
+    )
@@ -4,10 +4,20 @@ Unit tests for image ingestion service.
 Tests GPT-4o vision integration, category normalization,
 and expiry prediction pipeline.
 """
+import asyncio
+import io
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from datetime import date, timedelta
+from PIL import Image
 
+from app.core.rate_limit import TokenBucket
 from app.services.ingestion.gpt4o_vision import (
     GPT4oVisionClient,
     DetectedFoodItem,
@@ -20,12 +30,48 @@ from app.services.ingestion.image_ingestion import (
     GPT4O_DEFAULT_CONFIDENCE
 )
 
+# Pure CPU and fully mocked: safe to spread across pytest-xdist workers
+pytestmark = pytest.mark.parallel
+
+# Lowercased once for the prompt content checks below
+_PROMPT_LOWER = DETECTION_PROMPT.lower()
+
+REQUIRED_CATEGORIES = (
+    "dairy", "meat", "poultry", "fish", "seafood",
+    "vegetables", "fruits", "bread", "bakery", "eggs",
+    "condiments", "beverages", "snacks", "frozen", "canned"
+)
+# One alternation finds every category in a single pass over the prompt
+# (no category name contains another, so non-overlapping matches are enough)
+_CATEGORY_PATTERN = re.compile("|".join(map(re.escape, REQUIRED_CATEGORIES)))
+
+
+def _completion(content):
+    """Plain stand-in for a chat completion carrying one message."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _prediction(days, reasoning):
+    """Plain stand-in for an ExpiryPrediction (only the fields ingestion reads)."""
+    return SimpleNamespace(expiry_date=date.today() + timedelta(days=days), reasoning=reasoning)
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _stub_openai():
+    """Stub the SDK clients so no test can build a real OpenAI client by accident."""
+    with patch("app.services.ingestion.gpt4o_vision.OpenAI", MagicMock()) as stub, \
+            patch("app.services.ingestion.gpt4o_vision.AsyncOpenAI", MagicMock()):
+        yield stub
+
 
 class TestGPT4oVisionClient:
     """Tests for the GPT-4o Vision API client."""
 
-    def setup_method(self):
-        self.client = GPT4oVisionClient()
+    @classmethod
+    def setup_class(cls):
+        # Shared by the stateless helper tests; tests that use the API or
+        # cache build their own client
+        cls.client = GPT4oVisionClient()
 
     def test_detect_image_type_jpeg(self):
         """JPEG images should be detected correctly."""
@@ -52,16 +98,12 @@ class TestGPT4oVisionClient:
         unknown_bytes = b"UNKNOWN" + b"\x00" * 10
         assert self.client._detect_image_type(unknown_bytes) == "jpeg"
 
-    @patch("app.services.ingestion.gpt4o_vision.OpenAI")
-    def test_detect_food_items_success(self, mock_openai_class):
+    def test_detect_food_items_success(self):
         """Successful detection should return list of DetectedFoodItem."""
         # Mock the OpenAI response
         mock_client = MagicMock()
-        mock_openai_class.return_value = mock_client
 
-        mock_response = MagicMock()
-        mock_response.choices = [MagicMock()]
-        mock_response.choices[0].message.content = '{"items": [{"name": "milk", "category": "dairy"}, {"name": "chicken breast", "category": "meat"}]}'
+        mock_response = _completion('{"items": [{"name": "milk", "category": "dairy"}, {"name": "chicken breast", "category": "meat"}]}')
         mock_client.chat.completions.create.return_value = mock_response
 
         client = GPT4oVisionClient()
@@ -75,15 +117,11 @@ class TestGPT4oVisionClient:
         assert result[1].name == "chicken breast"
         assert result[1].category == "meat"
 
-    @patch("app.services.ingestion.gpt4o_vision.OpenAI")
-    def test_detect_food_items_empty_response(self, mock_openai_class):
+    def test_detect_food_items_empty_response(self):
         """Empty detection should return empty list."""
         mock_client = MagicMock()
-        mock_openai_class.return_value = mock_client
 
-        mock_response = MagicMock()
-        mock_response.choices = [MagicMock()]
-        mock_response.choices[0].message.content = '{"items": []}'
+        mock_response = _completion('{"items": []}')
         mock_client.chat.completions.create.return_value = mock_response
 
         client = GPT4oVisionClient()
@@ -93,11 +131,9 @@ class TestGPT4oVisionClient:
 
         assert len(result) == 0
 
-    @patch("app.services.ingestion.gpt4o_vision.OpenAI")
-    def test_detect_food_items_api_error(self, mock_openai_class):
+    def test_detect_food_items_api_error(self):
         """API errors should raise RuntimeError."""
         mock_client = MagicMock()
-        mock_openai_class.return_value = mock_client
         mock_client.chat.completions.create.side_effect = Exception("API Error")
 
         client = GPT4oVisionClient()
@@ -108,12 +144,114 @@ class TestGPT4oVisionClient:
 
         assert "GPT-4o API error" in str(exc_info.value)
 
+    def test_detect_food_items_reuses_cached_result(self):
+        """The same image bytes should only be sent to the API once."""
+        mock_client = MagicMock()
+
+        mock_response = _completion('{"items": [{"name": "milk", "category": "dairy"}]}')
+        mock_client.chat.completions.create.return_value = mock_response
+
+        client = GPT4oVisionClient()
+        client._client = mock_client
+
+        first = client.detect_food_items(b"\xff\xd8\xff")
+        second = client.detect_food_items(b"\xff\xd8\xff")
+
+        assert mock_client.chat.completions.create.call_count == 1
+        assert [item.name for item in second] == [item.name for item in first]
+
+        client.cache_clear()
+        client.detect_food_items(b"\xff\xd8\xff")
+        assert mock_client.chat.completions.create.call_count == 2
+
+    def test_detect_food_items_caps_concurrent_calls(self):
+        """Parallel detections should never have more than 3 API calls in flight."""
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def fake_create(**kwargs):
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return _completion('{"items": []}')
+
+        mock_client = MagicMock()
+        mock_client.chat.completions.create.side_effect = fake_create
+
+        client = GPT4oVisionClient()
+        client._client = mock_client
+        client._slots = threading.BoundedSemaphore(3)
+        client._rate = TokenBucket(rate=1000, capacity=1000)  # isolate the concurrency cap
+
+        images = [b"\xff\xd8\xff" + bytes([i]) for i in range(20)]
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            list(pool.map(client.detect_food_items, images))
+
+        assert mock_client.chat.completions.create.call_count == 20
+        assert peak <= 3
+
+    def test_large_photo_is_downscaled_before_upload(self):
+        """Large photos should be re-encoded small, with low detail, before upload."""
+        photo = io.BytesIO()
+        Image.new("RGB", (4000, 3000), (200, 120, 40)).save(photo, format="PNG")
+
+        part = self.client._image_part(photo.getvalue())
+
+        assert part["image_url"]["detail"] == "low"
+        assert part["image_url"]["url"].startswith("data:image/jpeg;base64,")
+        assert len(part["image_url"]["url"]) < 200 * 1024
+
+    def test_detect_food_items_batch_preserves_order(self):
+        """Batched detection should send all images in one call and keep their order."""
+        mock_client = MagicMock()
+
+        mock_response = _completion(
+            '{"results": [{"items": [{"name": "milk", "category": "Dairy"}]},'
+            ' {"items": [{"name": "apple", "category": "Fruits"}]}]}'
+        )
+        mock_client.chat.completions.create.return_value = mock_response
+
+        client = GPT4oVisionClient()
+        client._client = mock_client
+
+        result = client.detect_food_items_batch([b"\xff\xd8\xff\x01", b"\xff\xd8\xff\x02"])
+
+        assert mock_client.chat.completions.create.call_count == 1
+        content = mock_client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert [part["type"] for part in content] == ["text", "image_url", "image_url"]
+        assert [[item.name for item in items] for items in result] == [["milk"], ["apple"]]
+
+    def test_parse_batch_treats_malformed_entries_as_empty(self):
+        """Non-object batch entries count as images with no detections."""
+        result = self.client._parse_batch('{"results": [null, 1, {"items": [{"name": "milk"}]}]}', 3)
+
+        assert [[item.name for item in items] for items in result] == [[], [], ["milk"]]
+
+        with pytest.raises(RuntimeError):
+            self.client._parse_batch('[{"items": []}]', 1)
+
+    def test_build_items_skips_wrongly_typed_entries(self):
+        """A wrongly typed entry is skipped without discarding valid ones."""
+        result = self.client._build_items([
+            {"name": "milk", "category": "dairy"},
+            {"name": "egg", "category": 3},
+        ])
+
+        assert [item.name for item in result] == ["milk"]
+
 
 class TestImageIngestionService:
     """Tests for the image ingestion orchestration service."""
 
-    def setup_method(self):
-        self.service = ImageIngestionService()
+    @classmethod
+    def setup_class(cls):
+        # The service holds no state; collaborators are patched per test
+        cls.service = ImageIngestionService()
 
     def test_normalize_category_dairy(self):
         """Dairy category should be normalized correctly."""
@@ -154,9 +292,7 @@ class TestImageIngestionService:
         ]
 
         # Mock expiry prediction
-        mock_prediction = MagicMock()
-        mock_prediction.expiry_date = date.today() + timedelta(days=7)
-        mock_prediction.reasoning = "Based on category 'dairy' stored in 'fridge'"
+        mock_prediction = _prediction(days=7, reasoning="Based on category 'dairy' stored in 'fridge'")
         mock_expiry_service.predict_expiry.return_value = mock_prediction
 
         result = self.service.ingest_from_image(
@@ -205,9 +341,7 @@ class TestImageIngestionService:
             DetectedFoodItem(name="chicken", category="meat"),
         ]
 
-        mock_prediction = MagicMock()
-        mock_prediction.expiry_date = date.today() + timedelta(days=90)
-        mock_prediction.reasoning = "Based on category 'meat' stored in 'freezer'"
+        mock_prediction = _prediction(days=90, reasoning="Based on category 'meat' stored in 'freezer'")
         mock_expiry_service.predict_expiry.return_value = mock_prediction
 
         result = self.service.ingest_from_image(
@@ -223,26 +357,42 @@ class TestImageIngestionService:
             storage_location="freezer"
         )
 
+    @patch("app.services.ingestion.image_ingestion.gpt4o_vision_client")
+    @patch("app.services.ingestion.image_ingestion.expiry_prediction_service")
+    def test_ingest_from_image_async_success(self, mock_expiry_service, mock_vision_client):
+        """Async ingestion should await the async vision client and process items."""
+        mock_vision_client.adetect_food_items = AsyncMock(return_value=[
+            DetectedFoodItem(name="whole milk", category="dairy"),
+        ])
+
+        mock_prediction = _prediction(days=7, reasoning="Based on category 'dairy' stored in 'fridge'")
+        mock_expiry_service.predict_expiry.return_value = mock_prediction
+
+        result = asyncio.run(self.service.ingest_from_image_async(
+            image_bytes=b"\xff\xd8\xff",
+            storage_location="fridge"
+        ))
+
+        assert result.success is True
+        assert result.detected_items[0].name == "whole milk"
+        mock_vision_client.adetect_food_items.assert_awaited_once_with(b"\xff\xd8\xff")
+        mock_vision_client.detect_food_items.assert_not_called()
+
 
 class TestDetectionPrompt:
     """Tests for the GPT-4o detection prompt."""
 
     def test_prompt_includes_required_categories(self):
         """Prompt should include all required food categories."""
-        required_categories = [
-            "dairy", "meat", "poultry", "fish", "seafood",
-            "vegetables", "fruits", "bread", "bakery", "eggs",
-            "condiments", "beverages", "snacks", "frozen", "canned"
-        ]
+        found = set(_CATEGORY_PATTERN.findall(_PROMPT_LOWER))
 
-        for category in required_categories:
-            assert category in DETECTION_PROMPT.lower()
+        assert set(REQUIRED_CATEGORIES) - found == set()
 
     def test_prompt_requests_json_format(self):
         """Prompt should request JSON output format."""
-        assert "json" in DETECTION_PROMPT.lower()
-        assert "items" in DETECTION_PROMPT.lower()
+        assert "json" in _PROMPT_LOWER
+        assert "items" in _PROMPT_LOWER
 
     def test_prompt_emphasizes_clarity(self):
         """Prompt should emphasize clear identification."""
-        assert "clearly identify" in DETECTION_PROMPT.lower()
+        assert "clearly identify" in _PROMPT_LOWER